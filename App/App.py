@@ -29,6 +29,7 @@ from modules.order import place_order
 from modules.user_orders import display_user_orders
 from modules.auth import auth0_authentication
 from modules.map import display_map
+from modules.ids import get_id_generator
 
 # --- SHARED ON ALL PAGES ---
 st.logo("https://raw.githubusercontent.com/PastoVerdeHN/PastoVerdeHN/refs/heads/main/menu_24dp_5F6368_FILL0_wght400_GRAD0_opsz24.png")
@@ -66,6 +67,9 @@ if not database_url:
   logging.error("Database URL not found. Cannot proceed without database access.")
   st.stop()
 
+# Check the order ID node id at startup rather than at the first checkout
+get_id_generator()
+
 def show_policy_banner():
     if 'policy_accepted' not in st.session_state:
         st.session_state.policy_accepted = False
@@ -0,0 +1,114 @@
+"""Admin search latency: ILIKE '%term%' scans vs the trigram search indexes.
+
+    python -m benchmarks.bench_admin_search --users 500000
+    python -m benchmarks.bench_admin_search --database-url postgresql://...
+
+Defaults to a throwaway SQLite file. The database must be empty: the script
+creates the tables, loads synthetic users and orders, measures the scans,
+then builds the search indexes and measures `modules.search.search`.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import sessionmaker
+
+from modules.models import Base, Order, OrderStatus, User, UserType
+from modules.search import SEARCH_COLUMNS, SEARCH_LIMIT, create_search_indexes, search
+
+NOW = datetime(2026, 1, 1)
+FIRST_NAMES = ["María", "José", "Ana", "Carlos", "Lucía", "Jorge", "Sofía", "Luis", "Elena", "Mario"]
+LAST_NAMES = ["Hernández", "López", "Martínez", "Rodríguez", "García", "Flores", "Mejía", "Reyes", "Cruz", "Zelaya"]
+COLONIAS = ["Palmira", "Lomas del Guijarro", "Kennedy", "Miraflores", "Las Colinas", "El Hatillo", "Tepeyac"]
+
+def load_data(engine, users, orders_per_user, batch_size=50000):
+  for offset in range(0, users, batch_size):
+      batch = []
+      for i in range(offset, min(offset + batch_size, users)):
+          first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+          batch.append({
+              "id": f"user-{i}", "name": f"{first} {last} {i}", "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+              "type": UserType.customer, "is_active": True, "created_at": NOW,
+          })
+      with engine.begin() as conn:
+          conn.execute(User.__table__.insert(), batch)
+  orders = int(users * orders_per_user)
+  for offset in range(0, orders, batch_size):
+      batch = []
+      for i in range(offset, min(offset + batch_size, orders)):
+          created_at = NOW - timedelta(minutes=random.randrange(365 * 24 * 60))
+          batch.append({
+              "id": f"ORD-{i:08d}", "user_id": f"user-{random.randrange(users)}", "product_id": 1,
+              "quantity": 1, "date": created_at, "delivery_date": created_at + timedelta(days=2),
+              "delivery_address": f"Casa {random.randrange(1, 900)}, Colonia {random.choice(COLONIAS)}",
+              "phone_number": f"9{random.randrange(10**7):07d}", "status": OrderStatus.pending,
+              "total_price": 999.95, "created_at": created_at,
+          })
+      with engine.begin() as conn:
+          conn.execute(Order.__table__.insert(), batch)
+  return orders
+
+def terms(users, orders):
+  return {
+      User: ["zelaya", f"{random.randrange(users)}@exa", "sofía mej", "nobody"],
+      Order: [f"{random.randrange(orders):08d}"[-6:], f"9{random.randrange(10**7):07d}"[:6], "guijarro", "casa 12,", "nowhere"],
+  }
+
+def scan(session, model, term, limit):
+  columns = [getattr(model, name) for name in SEARCH_COLUMNS[model]]
+  return session.query(model).filter(or_(*[column.ilike(f"%{term}%") for column in columns])).limit(limit).all()
+
+def measure(session, search_terms, find, repeats):
+  results = {}
+  for model, model_terms in search_terms.items():
+      for term in model_terms:
+          timings = []
+          for _ in range(repeats):
+              start = time.perf_counter()
+              rows = find(session, model, term, SEARCH_LIMIT)
+              timings.append((time.perf_counter() - start) * 1000)
+          results[(model.__tablename__, term)] = (statistics.median(timings), len(rows))
+  return results
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--users", type=int, default=500000)
+  parser.add_argument("--orders-per-user", type=float, default=2.0)
+  parser.add_argument("--repeats", type=int, default=5)
+  parser.add_argument("--database-url", default=None)
+  args = parser.parse_args()
+
+  database_url = args.database_url
+  if database_url is None:
+      path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+      database_url = f"sqlite:///{path}"
+  engine = create_engine(database_url)
+  random.seed(42)
+
+  Base.metadata.create_all(engine)
+  start = time.perf_counter()
+  orders = load_data(engine, args.users, args.orders_per_user)
+  print(f"Loaded {args.users} users and {orders} orders in {time.perf_counter() - start:.1f}s")
+
+  search_terms = terms(args.users, orders)
+  session = sessionmaker(bind=engine)()
+  before = measure(session, search_terms, scan, args.repeats)
+  start = time.perf_counter()
+  with engine.begin() as conn:
+      create_search_indexes(conn)
+  print(f"Built search indexes in {time.perf_counter() - start:.1f}s")
+  after = measure(session, search_terms, lambda session, model, term, limit: search(session, model, term, limit), args.repeats)
+
+  print(f"\n{'table':8s} {'term':20s} {'ILIKE scan':>14s} {'indexed search':>16s} {'speedup':>8s}")
+  for key, (scan_ms, scan_rows) in before.items():
+      search_ms, search_rows = after[key]
+      print(f"{key[0]:8s} {key[1]:20s} {scan_ms:8.2f} ms ({scan_rows:2d}) {search_ms:9.2f} ms ({search_rows:2d}) "
+            f"{scan_ms / max(search_ms, 1e-6):7.1f}x")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,146 @@
+"""Query plans and latency for the order access paths, before and after indexes.
+
+    python -m benchmarks.bench_order_indexes --rows 1000000
+    python -m benchmarks.bench_order_indexes --database-url postgresql://...
+
+Defaults to a throwaway SQLite file. The database must be empty: the script
+creates the tables, drops the query indexes, loads synthetic data, measures,
+then builds the indexes and measures again.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from modules.models import Base, Order, OrderStatus, Subscription, User, UserType
+
+USERS = 50000
+NOW = datetime(2026, 1, 1)
+PLANS = ["Suscripción Anual", "Suscripción Semestral", "Suscripción Mensual", "Sin Suscripción"]
+
+QUERY_INDEXES = [
+  "ix_orders_user_id_created_at",
+  "ix_orders_created_at",
+  "ix_orders_status_updated_at",
+  "ix_subscriptions_user_id",
+]
+
+QUERIES = {
+  "user orders": (
+      "SELECT id, status, created_at FROM orders WHERE user_id = :user_id ORDER BY created_at DESC",
+      lambda: {"user_id": f"user-{random.randrange(USERS)}"},
+  ),
+  "analytics range by status": (
+      "SELECT status, count(id) FROM orders WHERE created_at BETWEEN :start AND :end GROUP BY status",
+      lambda: {"start": NOW - timedelta(days=30), "end": NOW},
+  ),
+  "analytics range by plan": (
+      "SELECT plan_name, count(id) FROM orders WHERE created_at BETWEEN :start AND :end GROUP BY plan_name",
+      lambda: {"start": NOW - timedelta(days=30), "end": NOW},
+  ),
+  "status sweep": (
+      "SELECT count(id) FROM orders WHERE status = :status AND updated_at < :cutoff",
+      lambda: {"status": OrderStatus.confirmed.name, "cutoff": NOW - timedelta(days=1)},
+  ),
+  "subscriptions by user": (
+      "SELECT s.id FROM subscriptions s JOIN users u ON u.id = s.user_id WHERE s.user_id = :user_id",
+      lambda: {"user_id": f"user-{random.randrange(USERS)}"},
+  ),
+}
+
+def load_data(engine, rows, batch_size=50000):
+  statuses = list(OrderStatus)
+  with engine.begin() as conn:
+      conn.execute(User.__table__.insert(), [{
+          "id": f"user-{i}", "name": f"Cliente {i}", "email": f"cliente{i}@example.com",
+          "type": UserType.customer, "address": "", "is_active": True,
+      } for i in range(USERS)])
+      conn.execute(Subscription.__table__.insert(), [{
+          "user_id": f"user-{i}", "plan_name": random.choice(PLANS[:3]), "start_date": NOW, "is_active": True,
+      } for i in range(0, USERS, 3)])
+  for offset in range(0, rows, batch_size):
+      batch = []
+      for i in range(offset, min(offset + batch_size, rows)):
+          created_at = NOW - timedelta(minutes=random.randrange(365 * 24 * 60))
+          batch.append({
+              "id": f"ORD-{i:08d}", "user_id": f"user-{random.randrange(USERS)}", "product_id": 1,
+              "quantity": 1, "date": created_at, "delivery_date": created_at + timedelta(days=2),
+              "delivery_address": "Casa 1, Colonia Palmira", "status": random.choice(statuses),
+              "total_price": 999.95, "created_at": created_at, "updated_at": created_at,
+              "plan_name": random.choice(PLANS),
+          })
+      with engine.begin() as conn:
+          conn.execute(Order.__table__.insert(), batch)
+
+def explain(conn, sql, params):
+  prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+  return [" ".join(str(col) for col in row) for row in conn.execute(text(prefix + sql), params)]
+
+def measure(engine, repeats):
+  results = {}
+  with engine.connect() as conn:
+      for name, (sql, make_params) in QUERIES.items():
+          plan = explain(conn, sql, make_params())
+          timings = []
+          for _ in range(repeats):
+              params = make_params()
+              start = time.perf_counter()
+              conn.execute(text(sql), params).fetchall()
+              timings.append((time.perf_counter() - start) * 1000)
+          results[name] = (statistics.median(timings), plan)
+  return results
+
+def report(label, results):
+  print(f"\n== {label} ==")
+  for name, (median_ms, plan) in results.items():
+      print(f"{name:28s} {median_ms:10.2f} ms")
+      for line in plan:
+          print(f"    {line}")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--rows", type=int, default=1000000)
+  parser.add_argument("--repeats", type=int, default=20)
+  parser.add_argument("--database-url", default=None)
+  args = parser.parse_args()
+
+  database_url = args.database_url
+  if database_url is None:
+      path = os.path.join(tempfile.mkdtemp(), "bench_orders.db")
+      database_url = f"sqlite:///{path}"
+  engine = create_engine(database_url)
+  random.seed(42)
+
+  Base.metadata.create_all(engine)
+  indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+  with engine.begin() as conn:
+      for name in QUERY_INDEXES:
+          indexes[name].drop(conn, checkfirst=True)
+
+  start = time.perf_counter()
+  load_data(engine, args.rows)
+  print(f"Loaded {args.rows} orders in {time.perf_counter() - start:.1f}s")
+
+  before = measure(engine, args.repeats)
+  start = time.perf_counter()
+  with engine.begin() as conn:
+      for name in QUERY_INDEXES:
+          indexes[name].create(conn)
+      if conn.dialect.name == "sqlite":
+          conn.execute(text("ANALYZE"))
+  print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+  after = measure(engine, args.repeats)
+
+  report("without query indexes", before)
+  report("with query indexes", after)
+  print("\n== speedup (median) ==")
+  for name in QUERIES:
+      print(f"{name:28s} {before[name][0] / max(after[name][0], 1e-6):8.1f}x")
+
+if __name__ == "__main__":
+  main()
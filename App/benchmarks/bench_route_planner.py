@@ -0,0 +1,43 @@
+"""Route planner cost and quality: nearest-neighbor vs nearest-neighbor + 2-opt.
+
+    python -m benchmarks.bench_route_planner --stops 500 1000 3000 --time-limit 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modules.routes import haversine_matrix, nearest_neighbor_tour, tour_length, two_opt
+from modules.zones import TEGUCIGALPA_COORDS
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--stops", type=int, nargs="+", default=[500, 1000, 3000])
+  parser.add_argument("--time-limit", type=float, default=10.0, help="2-opt budget per route in seconds")
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(42)
+  for stops in args.stops:
+      lats = np.concatenate([[TEGUCIGALPA_COORDS[0]], rng.uniform(14.03, 14.13, stops)])
+      lons = np.concatenate([[TEGUCIGALPA_COORDS[1]], rng.uniform(-87.28, -87.14, stops)])
+
+      start = time.perf_counter()
+      distances = haversine_matrix(lats, lons)
+      matrix_seconds = time.perf_counter() - start
+
+      start = time.perf_counter()
+      tour = nearest_neighbor_tour(distances)
+      nn_seconds = time.perf_counter() - start
+      nn_km = tour_length(distances, tour)
+
+      start = time.perf_counter()
+      tour = two_opt(distances, tour, args.time_limit)
+      opt_seconds = time.perf_counter() - start
+      opt_km = tour_length(distances, tour)
+
+      print(f"{stops} stops: matrix {matrix_seconds:.3f} s ({distances.nbytes / 2**20:.1f} MiB), "
+            f"nearest-neighbor {nn_km:.1f} km in {nn_seconds:.3f} s, "
+            f"2-opt {opt_km:.1f} km in {opt_seconds:.3f} s ({(1 - opt_km / nn_km) * 100:.1f}% shorter)")
+
+if __name__ == "__main__":
+  main()
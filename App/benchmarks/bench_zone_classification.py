@@ -0,0 +1,49 @@
+"""Delivery zone classification throughput: vectorized batch vs per-point.
+
+    python -m benchmarks.bench_zone_classification --points 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modules.zones import ZoneEngine
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--points", type=int, default=1000000)
+  parser.add_argument("--single-sample", type=int, default=20000,
+                      help="points classified one at a time to estimate the per-point path")
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(42)
+  # Slightly larger than the coverage area so some points fall outside it
+  lats = rng.uniform(14.00, 14.20, args.points)
+  lons = rng.uniform(-87.30, -87.00, args.points)
+
+  start = time.perf_counter()
+  engine = ZoneEngine()
+  print(f"Engine build: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+  start = time.perf_counter()
+  zones = engine.classify_many(lats, lons)
+  batch_seconds = time.perf_counter() - start
+  print(f"classify_many: {args.points} points in {batch_seconds:.3f} s "
+        f"({args.points / batch_seconds:,.0f} points/s)")
+
+  sample = min(args.single_sample, args.points)
+  start = time.perf_counter()
+  singles = [engine.classify(lats[i], lons[i]) for i in range(sample)]
+  single_seconds = time.perf_counter() - start
+  print(f"classify: {sample} points in {single_seconds:.3f} s "
+        f"(~{single_seconds / sample * args.points:.1f} s extrapolated to {args.points})")
+
+  mismatches = sum(a != b for a, b in zip(engine.names_for(zones[:sample]), singles))
+  print(f"batch/single mismatches on sample: {mismatches}")
+
+  names, counts = np.unique(zones, return_counts=True)
+  for zone, count in zip(engine.names_for(names), counts):
+      print(f"  {zone or 'Fuera de cobertura':20s} {count:10d}")
+
+if __name__ == "__main__":
+  main()
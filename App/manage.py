@@ -0,0 +1,108 @@
+"""Operational commands for ©Pasto Verde, run from the App directory.
+
+    python manage.py bootstrap-schema
+    python manage.py schema-version
+    python manage.py backfill-rollups
+    python manage.py backfill-locations
+    python manage.py rebuild-slots
+    python manage.py advance-order-statuses
+    python manage.py renew-subscriptions [--backfill]
+    python manage.py reconcile-counters
+    python manage.py vendor-map-assets
+"""
+import argparse
+import logging
+
+from modules.database import get_engine
+from modules.schema import SCHEMA_VERSION, bootstrap_schema, current_version
+from modules.rollups import rebuild_rollups
+from modules.slots import rebuild_slots
+from modules.addresses import backfill_locations
+from modules.transitions import sweep_order_statuses
+from modules.renewals import renew_subscriptions
+from modules.counters import reconcile_counters
+from modules.map_cache import vendor_map_assets
+
+logging.basicConfig(
+  level=logging.INFO,
+  format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+def bootstrap_schema_command(args):
+  applied = bootstrap_schema(get_engine(args.database_url))
+  if applied:
+      print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+  else:
+      print(f"Schema already at version {SCHEMA_VERSION}.")
+
+def schema_version_command(args):
+  with get_engine(args.database_url).connect() as conn:
+      print(f"Database: {current_version(conn)} / code: {SCHEMA_VERSION}")
+
+def backfill_rollups_command(args):
+  with get_engine(args.database_url).begin() as conn:
+      rows = rebuild_rollups(conn)
+  print(f"Rebuilt {rows} rollup rows.")
+
+def backfill_locations_command(args):
+  with get_engine(args.database_url).begin() as conn:
+      orders_updated, users_updated = backfill_locations(conn)
+      # Zones changed through Core updates, so recount the rollups and slots
+      rebuild_rollups(conn)
+      rebuild_slots(conn)
+  print(f"Backfilled {orders_updated} orders and {users_updated} users.")
+
+def rebuild_slots_command(args):
+  with get_engine(args.database_url).begin() as conn:
+      rows = rebuild_slots(conn)
+  print(f"Rebuilt {rows} delivery slot counters.")
+
+def advance_order_statuses_command(args):
+  counts = sweep_order_statuses(get_engine(args.database_url))
+  for (source, target), count in counts.items():
+      print(f"{source.value} -> {target.value}: {count}")
+
+def renew_subscriptions_command(args):
+  stats = renew_subscriptions(get_engine(args.database_url), backfill=args.backfill)
+  print(f"Expired {stats['expired']} subscriptions; scanned {stats['scanned']}, created {stats['created']} delivery orders.")
+
+def reconcile_counters_command(args):
+  drifted = reconcile_counters(get_engine(args.database_url))
+  for name, (stored, actual) in drifted.items():
+      print(f"{name}: {stored} -> {actual}")
+  print(f"Reconciled {len(drifted)} KPI counters.")
+
+def vendor_map_assets_command(args):
+  paths = vendor_map_assets()
+  print(f"Downloaded {len(paths)} map assets into static/vendor.")
+
+COMMANDS = {
+  "bootstrap-schema": (bootstrap_schema_command, "Create tables and apply pending migrations"),
+  "schema-version": (schema_version_command, "Show applied and expected schema versions"),
+  "backfill-rollups": (backfill_rollups_command, "Recompute daily order rollups from the orders table"),
+  "backfill-locations": (backfill_locations_command, "Fill colonia/zone columns on historical orders and users"),
+  "rebuild-slots": (rebuild_slots_command, "Recount delivery slot reservations from the orders table"),
+  "advance-order-statuses": (advance_order_statuses_command, "Apply the time-based order status transitions"),
+  "renew-subscriptions": (renew_subscriptions_command, "Create due subscription deliveries and expire ended plans"),
+  "reconcile-counters": (reconcile_counters_command, "Recount the overview KPI counters"),
+  "vendor-map-assets": (vendor_map_assets_command, "Download Leaflet/folium JS and CSS to serve them locally"),
+}
+
+def build_parser():
+  parser = argparse.ArgumentParser(description="©Pasto Verde management commands")
+  parser.add_argument("--database-url", default=None, help="Defaults to secrets/DATABASE_URL")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  for name, (handler, help_text) in COMMANDS.items():
+      subparser = subparsers.add_parser(name, help=help_text)
+      subparser.set_defaults(handler=handler)
+  subparsers.choices["renew-subscriptions"].add_argument(
+      "--backfill", action="store_true", help="Also create cycles whose delivery day already passed"
+  )
+  return parser
+
+def main():
+  args = build_parser().parse_args()
+  args.handler(args)
+
+if __name__ == "__main__":
+  main()
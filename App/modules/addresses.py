@@ -0,0 +1,119 @@
+import logging
+import re
+
+from sqlalchemy import bindparam, select, update
+
+from modules.models import Order, User
+from modules.zones import get_zone_engine, zone_for_point
+
+logger = logging.getLogger(__name__)
+
+# Prefixes people type in front of the colonia name; "Residencial" and
+# "Barrio" are kept because they distinguish places with the same name
+_COLONIA_PREFIX = re.compile(r"^(colonia|col\.?)\s+", re.IGNORECASE)
+_TRAILING_NOTES = re.compile(r"\s*\(.*\)\s*$")
+_SMALL_WORDS = {"de", "del", "la", "las", "los", "el", "y"}
+
+def normalize_colonia(text):
+  """Canonical colonia name: trimmed, 'Colonia'/'Col.' prefix removed, title-cased."""
+  if not text:
+      return None
+  text = " ".join(text.split()).strip(" ,.")
+  text = _COLONIA_PREFIX.sub("", text)
+  if not text:
+      return None
+  words = text.lower().split(" ")
+  return " ".join(
+      word if i and word in _SMALL_WORDS else word[:1].upper() + word[1:]
+      for i, word in enumerate(words)
+  )
+
+def colonia_from_address(address):
+  """Colonia from a stored delivery address.
+
+  Checkout writes "<casa y calle>, <colonia or geocoded place>[ (referencias)]",
+  so the colonia is the second comma-separated part.
+  """
+  if not address:
+      return None
+  parts = [part.strip() for part in _TRAILING_NOTES.sub("", address).split(",")]
+  parts = [part for part in parts if part]
+  if not parts:
+      return None
+  return normalize_colonia(parts[1] if len(parts) > 1 else parts[0])
+
+def location_fields(colonia, lat=None, lon=None):
+  """Column values for Order/User describing where a delivery goes."""
+  return {
+      "colonia": normalize_colonia(colonia),
+      "delivery_zone": zone_for_point(lat, lon) if lat is not None and lon is not None else None,
+      "delivery_lat": lat,
+      "delivery_lon": lon,
+  }
+
+def _local_coordinates(colonia):
+  from modules.geocoding import get_geocoder
+  _, result = get_geocoder().geocode_local(colonia)
+  return (result.lat, result.lon) if result else None
+
+def backfill_locations(conn, chunk_size=5000, coordinates=_local_coordinates):
+  """Fill colonia/zone on historical orders, then users from their latest order.
+
+  Orders without coordinates get their colonia's, looked up offline (gazetteer
+  and geocode cache, never the network) as checkout would have, so their zone
+  can be classified. Walks orders in primary key order in chunks so it can
+  run against a live database. Returns (orders_updated, users_updated).
+  """
+  orders = Order.__table__
+  users = User.__table__
+  update_order = update(orders).where(orders.c.id == bindparam("order_id")).values(
+      colonia=bindparam("new_colonia"), delivery_zone=bindparam("new_zone"),
+      delivery_lat=bindparam("new_lat"), delivery_lon=bindparam("new_lon"),
+  )
+  resolved = {}
+  orders_updated = 0
+  last_id = ""
+  while True:
+      rows = conn.execute(
+          select(orders.c.id, orders.c.delivery_address, orders.c.delivery_lat, orders.c.delivery_lon, orders.c.delivery_zone)
+          .where(orders.c.id > last_id, orders.c.colonia.is_(None))
+          .order_by(orders.c.id).limit(chunk_size)
+      ).all()
+      if not rows:
+          break
+      last_id = rows[-1].id
+      params = []
+      for row in rows:
+          colonia = colonia_from_address(row.delivery_address)
+          lat, lon = row.delivery_lat, row.delivery_lon
+          if (lat is None or lon is None) and colonia:
+              if colonia not in resolved:
+                  resolved[colonia] = coordinates(colonia)
+              lat, lon = resolved[colonia] or (None, None)
+          params.append({
+              "order_id": row.id, "new_colonia": colonia, "new_zone": row.delivery_zone,
+              "new_lat": lat, "new_lon": lon,
+          })
+      # Classify the chunk's coordinates in one vectorized call
+      located = [param for param in params if param["new_zone"] is None and param["new_lat"] is not None and param["new_lon"] is not None]
+      if located:
+          engine = get_zone_engine()
+          indices = engine.classify_many([param["new_lat"] for param in located], [param["new_lon"] for param in located])
+          for param, zone in zip(located, engine.names_for(indices)):
+              param["new_zone"] = zone
+      conn.execute(update_order, params)
+      orders_updated += len(params)
+      logger.info("Backfilled colonia for %d orders", orders_updated)
+
+  latest_colonia = (
+      select(orders.c.colonia)
+      .where(orders.c.user_id == users.c.id, orders.c.colonia.isnot(None))
+      .order_by(orders.c.created_at.desc())
+      .limit(1)
+      .scalar_subquery()
+  )
+  # Users with no colonia on any order stay NULL and are not counted
+  result = conn.execute(
+      update(users).where(users.c.colonia.is_(None), latest_colonia.isnot(None)).values(colonia=latest_colonia)
+  )
+  return orders_updated, result.rowcount
@@ -1,8 +1,13 @@
 import streamlit as st
 from sqlalchemy.orm import Session
-from modules.models import User, Product, Order, Subscription, setup_database
+from datetime import datetime, timedelta
+from modules.models import User, Product, Order, Subscription, OrderStatus, setup_database
+from modules.pagination import paginated_listing
+from modules.pickers import entity_picker
+from modules.counters import read_counters
+from modules.transitions import sweep_order_statuses
+from modules.network import EXPAND_LIMIT, MAX_NODES, elements, expand_node, remove_nodes, seed_graph
 from st_link_analysis import st_link_analysis, NodeStyle, EdgeStyle
-import random
 
 # Set page config at the very beginning
 st.set_page_config(layout="wide")
@@ -31,22 +36,19 @@ def show_overview(session):
   st.header("Platform Overview")
   
   col1, col2, col3, col4 = st.columns(4)
+  counters = read_counters(session)
   
   with col1:
-      user_count = session.query(User).count()
-      st.metric("Total Users", user_count)
+      st.metric("Total Users", int(counters["users"]))
   
   with col2:
-      product_count = session.query(Product).count()
-      st.metric("Total Products", product_count)
+      st.metric("Total Products", int(counters["products"]))
   
   with col3:
-      order_count = session.query(Order).count()
-      st.metric("Total Orders", order_count)
+      st.metric("Total Orders", int(counters["orders"]))
   
   with col4:
-      subscription_count = session.query(Subscription).count()
-      st.metric("Active Subscriptions", subscription_count)
+      st.metric("Active Subscriptions", int(counters["active_subscriptions"]))
 
   # Recent Orders
   st.subheader("Recent Orders")
@@ -56,158 +58,85 @@ def show_overview(session):
 
 def show_network_analysis(session):
   st.header("Network Analysis")
+  st.caption(
+      f"Starts from zones, plans and products. Double-click a node to load up to {EXPAND_LIMIT} "
+      f"of its most recent neighbors (at most {MAX_NODES} nodes); press Delete to hide nodes."
+  )
 
-  def get_color():
-      return f"#{random.randint(0, 0xFFFFFF):06x}"
-
-  def get_icon():
-      return random.choice(list(SUPPORTED_ICONS))
-
-  # Prepare data for network analysis
-  nodes = []
-  edges = []
-
-  # Users
-  users = session.query(User).all()
-  for user in users:
-      nodes.append({
-          "id": user.id,
-          "label": "USER",
-          "name": user.name,
-          "email": user.email,
-          "type": user.type.value,
-          "color": get_color(),
-          "icon": get_icon()
-      })
-
-  # Products
-  products = session.query(Product).all()
-  for product in products:
-      nodes.append({
-          "id": f"P{product.id}",
-          "label": "PRODUCT",
-          "name": product.name,
-          "price": product.price,
-          "color": get_color(),
-          "icon": get_icon()
-      })
-
-  # Orders
-  orders = session.query(Order).all()
-  for order in orders:
-      nodes.append({
-          "id": order.id,
-          "label": "ORDER",
-          "status": order.status.value,
-          "total_price": order.total_price,
-          "color": get_color(),
-          "icon": get_icon()
-      })
-      # User to Order edge
-      edges.append({
-          "id": f"UO{order.id}",
-          "source": order.user_id,
-          "target": order.id,
-          "label": "PLACED"
-      })
-      # Order to Product edge
-      edges.append({
-          "id": f"OP{order.id}",
-          "source": order.id,
-          "target": f"P{order.product_id}",
-          "label": "CONTAINS"
-      })
-
-  # Subscriptions
-  subscriptions = session.query(Subscription).all()
-  for sub in subscriptions:
-      nodes.append({
-          "id": f"S{sub.id}",
-          "label": "SUBSCRIPTION",
-          "plan_name": sub.plan_name,
-          "is_active": sub.is_active,
-          "color": get_color(),
-          "icon": get_icon()
-      })
-      # User to Subscription edge
-      edges.append({
-          "id": f"US{sub.id}",
-          "source": sub.user_id,
-          "target": f"S{sub.id}",
-          "label": "SUBSCRIBED"
-      })
-
-  # Create the network data structure
-  network_data = {
-      "nodes": nodes,
-      "edges": edges
-  }
+  if st.button("Reset graph") or "network_graph" not in st.session_state:
+      st.session_state.network_graph = seed_graph(session)
+      st.session_state.network_last_event = None
+  graph = st.session_state.network_graph
 
-  # Node and edge styles
+  # Node styles are fixed per label so colors are stable between renders
   node_styles = [
-      NodeStyle("USER", "#4CAF50", "name", "person"),
+      NodeStyle("ZONE", "#FF5722", "name", "map"),
+      NodeStyle("PLAN", "#9C27B0", "name", "calendar"),
       NodeStyle("PRODUCT", "#2196F3", "name", "package"),
+      NodeStyle("USER", "#4CAF50", "name", "person"),
       NodeStyle("ORDER", "#FFC107", "status", "shopping-cart"),
-      NodeStyle("SUBSCRIPTION", "#9C27B0", "plan_name", "calendar")
+      NodeStyle("SUBSCRIPTION", "#795548", "name", "calendar")
   ]
 
   edge_styles = [
-      EdgeStyle("PLACED", labeled=True, directed=True),
-      EdgeStyle("CONTAINS", labeled=True, directed=True),
-      EdgeStyle("SUBSCRIBED", labeled=True, directed=True)
+      EdgeStyle(label, labeled=True, directed=True)
+      for label in ("ORDERS", "CONTAINS", "FOR_PLAN", "IN_ZONE", "PLACED", "SUBSCRIBED")
   ]
 
-  # Layout settings
-  layout = {"name": "cose", "animate": "end", "nodeDimensionsIncludeLabels": False}
-
-  # Display the network
-  st_link_analysis(
-      network_data,
+  # Positions are computed server-side; the browser never runs a force layout
+  event = st_link_analysis(
+      elements(graph),
       node_styles=node_styles,
       edge_styles=edge_styles,
-      layout=layout,
+      layout={"name": "preset", "fit": True, "padding": 20, "animate": False},
+      node_actions=["expand", "remove"],
       key="network"
   )
 
+  # The component keeps returning its last event, so handle each one once
+  if event and event.get("timestamp") != st.session_state.network_last_event:
+      st.session_state.network_last_event = event.get("timestamp")
+      node_ids = event.get("data", {}).get("node_ids", [])
+      if event.get("action") == "expand":
+          added = 0
+          for node_id in node_ids:
+              count, capped = expand_node(session, graph, node_id)
+              added += count
+              if capped:
+                  st.warning(f"Graph is limited to {MAX_NODES} nodes; hide some nodes or reset it to keep exploring.")
+          if added:
+              st.rerun()
+      elif event.get("action") == "remove":
+          remove_nodes(graph, node_ids)
+
+  st.write(f"{len(graph['nodes'])} nodes, {len(graph['edges'])} edges")
+
 def show_order_management(session):
   st.header("Order Management")
 
-  # Function to update order status
-  def update_order_status(order_id, new_status):
-      order = session.query(Order).filter_by(id=order_id).first()
-      if order:
-          order.status = new_status
-          order.updated_at = datetime.utcnow()
-          session.commit()
-          st.success(f"Order {order_id} updated to {new_status.value}")
-      else:
-          st.error(f"Order {order_id} not found")
-
-  # Function to automatically update order status based on time
-  def auto_update_order_status():
-      current_time = datetime.utcnow()
-      orders = session.query(Order).all()
-      for order in orders:
-          if order.status == OrderStatus.pending and (current_time - order.created_at) > timedelta(hours=1):
-              update_order_status(order.id, OrderStatus.confirmed)
-          elif order.status == OrderStatus.confirmed and (current_time - order.updated_at) > timedelta(days=1):
-              update_order_status(order.id, OrderStatus.shipped)
-          elif order.status == OrderStatus.shipped and (current_time - order.updated_at) > timedelta(days=3):
-              update_order_status(order.id, OrderStatus.delivered)
+  def update_order(order, new_status):
+      order.status = new_status
+      order.updated_at = datetime.utcnow()
+      session.commit()
+      st.success(f"Order {order.id} updated to {new_status.value}")
 
   # Manual order status update
   st.subheader("Manual Order Status Update")
-  orders = session.query(Order).all()
-  order_id = st.selectbox("Select Order ID", [order.id for order in orders])
+  selected_order = entity_picker(session, Order, "Search order by ID", "order_management", empty_text="No matching orders.")
   new_status = st.selectbox("Select New Status", [status for status in OrderStatus])
-  if st.button("Update Order Status"):
-      update_order_status(order_id, new_status)
+  if st.button("Update Order Status", disabled=selected_order is None):
+      update_order(selected_order, new_status)
 
   # Automatic order status update
   st.subheader("Automatic Order Status Update")
+  st.caption("The background worker (`python worker.py`) runs this sweep every 15 minutes; the button runs it now.")
   if st.button("Run Automatic Updates"):
-      auto_update_order_status()
+      counts = sweep_order_statuses()
       st.success("Automatic updates completed")
+      st.table([
+          {"From": source.value, "To": target.value, "Orders": count}
+          for (source, target), count in counts.items()
+      ])
 
   # Order Status Flow Visualization
   st.subheader("Order Status Flow")
@@ -220,6 +149,7 @@ def show_order_management(session):
       OrderStatus.cancelled: -1
   }
 
+  orders = paginated_listing("order_management", session.query(Order), [Order.created_at, Order.id], label="orders")
   for order in orders:
       st.write(f"Order {order.id}: {order.status.value}")
       progress = status_flow[order.status] / 4  # Normalize to 0-1 range
@@ -0,0 +1,57 @@
+import pandas as pd
+from sqlalchemy import func
+
+from modules.cache import dashboard_cache
+from modules.models import Order, User
+from modules.rollups import rollup_query
+
+TREND_COLUMNS = ["day", "status", "plan_name", "orders", "revenue"]
+COLONIA_COLUMNS = ["colonia", "customer_colonia", "orders"]
+
+def _load_order_trends(session, start_date, end_date):
+  rows = rollup_query(session, start_date, end_date, "day", "status", "plan_name").all()
+  frame = pd.DataFrame([tuple(row) for row in rows], columns=TREND_COLUMNS)
+  frame["day"] = pd.to_datetime(frame["day"])
+  frame["status"] = frame["status"].map(lambda status: status.value.capitalize()).astype("category")
+  frame["plan_name"] = frame["plan_name"].astype("category")
+  frame["orders"] = frame["orders"].astype("int64")
+  frame["revenue"] = frame["revenue"].astype("float64")
+  return frame
+
+def order_trends(session, start_date, end_date):
+  """Orders and revenue per day x status x plan over [start_date, end_date], from the daily rollups."""
+  return dashboard_cache.get_or_load(
+      ("order_trends", start_date, end_date), ("order_daily_rollups",),
+      lambda: _load_order_trends(session, start_date, end_date),
+  )
+
+def _load_colonia_facts(session, start, end):
+  rows = session.query(
+      Order.colonia, User.colonia, func.count(Order.id),
+  ).outerjoin(User, User.id == Order.user_id
+  ).filter(Order.created_at.between(start, end)
+  ).group_by(Order.colonia, User.colonia).all()
+
+  frame = pd.DataFrame([tuple(row) for row in rows], columns=COLONIA_COLUMNS)
+  for column in ("colonia", "customer_colonia"):
+      frame[column] = frame[column].astype("category")
+  frame["orders"] = frame["orders"].astype("int64")
+  return frame
+
+def colonia_facts(session, start, end):
+  """Orders in [start, end] grouped by delivery colonia x customer colonia.
+
+  Customer colonias change with the users table, so these are not rolled up.
+  """
+  return dashboard_cache.get_or_load(
+      ("colonia_facts", start, end), ("orders", "users"), lambda: _load_colonia_facts(session, start, end)
+  )
+
+def summarize(frame, by, value="orders", drop_blank=False, sort=False):
+  """Sum `value` per `by` from an order_trends or colonia_facts frame, as a plain two-column frame."""
+  summary = frame.groupby(by, observed=True)[value].sum().reset_index()
+  if drop_blank:
+      summary = summary[summary[by].notna() & (summary[by].astype(str) != "")]
+  if sort:
+      summary = summary.sort_values(value, ascending=False)
+  return summary
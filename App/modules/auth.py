@@ -1,27 +1,58 @@
 import streamlit as st
-from sqlalchemy.orm import sessionmaker
+from collections import namedtuple
 from datetime import datetime
-from modules.models import User, UserType, Base
+from modules.models import User, UserType
 from auth0_component import login_button
-from sqlalchemy import create_engine
+from modules.database import get_engine, get_sessionmaker
+from modules.schema import ensure_schema
+from modules.logins import last_login_buffer
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def setup_database(database_url):
-  try:
-      debug_mode = st.secrets.get("debug", False)  # Default to False if not specified
-      logger.info("Setting up database with debug mode: %s", debug_mode)
-  except KeyError:
-      st.error("Database URL not found in Streamlit secrets. Please check your configuration.")
-      logger.error("Database URL not found in Streamlit secrets.")
-      st.stop()
-  
-  engine = create_engine(database_url, echo=debug_mode)
-  Base.metadata.create_all(engine)
-  logger.info("Database setup complete.")
-  return sessionmaker(bind=engine)
+  ensure_schema(get_engine(database_url))
+  return get_sessionmaker(database_url)
+
+# Kept in st.session_state instead of a User instance: immutable, detached
+# from any session and cheap to copy between reruns
+UserPrincipal = namedtuple("UserPrincipal", "id name email type")
+
+def login_user(session, user_info, admin_email):
+  """Principal for an Auth0 login, registering the user on first login.
+
+  A returning user costs one indexed read; last_login goes through the
+  write-behind buffer instead of a commit per login.
+  """
+  email = user_info['email']
+  row = session.query(User.id, User.name, User.email, User.type).filter_by(email=email).first()
+  if row is None:
+      logger.info("New user registration for email: %s", email)
+      now = datetime.utcnow()
+      user = User(
+          id=user_info['sub'],
+          name=user_info['name'],
+          email=email,
+          type=UserType.admin if email == admin_email else UserType.customer,
+          address='',
+          created_at=now,
+          last_login=now,
+      )
+      principal = UserPrincipal(user.id, user.name, user.email, user.type)
+      session.add(user)
+      session.commit()
+      logger.info("User registered successfully.")
+      return principal
+
+  logger.info("User found: %s", email)
+  principal = UserPrincipal(*row)
+  if email == admin_email and principal.type != UserType.admin:
+      session.query(User).filter_by(id=principal.id).update({"type": UserType.admin})
+      session.commit()
+      principal = principal._replace(type=UserType.admin)
+  last_login_buffer(session.get_bind()).record(principal.id)
+  return principal
 
 def auth0_authentication():
   logger.info("Starting authentication process")
@@ -56,34 +87,11 @@ def auth0_authentication():
           
           if user_info and st.session_state.auth_status != "authenticated":
               logger.info("User info retrieved: %s", user_info)
-              session = Session()
-              user = session.query(User).filter_by(email=user_info['email']).first()
-              
-              if not user:
-                  logger.info("New user registration for email: %s", user_info['email'])
-                  user = User(
-                      id=user_info['sub'],
-                      name=user_info['name'],
-                      email=user_info['email'],
-                      type=UserType.admin if user_info['email'] == ADMIN_EMAIL else UserType.customer,
-                      address='',
-                      created_at=datetime.utcnow(),
-                  )
-                  session.add(user)
-                  session.commit()
-                  logger.info("User registered successfully.")
-              else:
-                  logger.info("User found: %s", user.email)
-                  if user.email == ADMIN_EMAIL:
-                      user.type = UserType.admin  # Set user type to admin if necessary
-              
-              user.last_login = datetime.utcnow()
-              session.commit()
-              logger.info("User last login updated.")
+              with Session() as session:
+                  user = login_user(session, user_info, ADMIN_EMAIL)
               
               st.session_state.user = user
               st.session_state.auth_status = "authenticated"
               st.success(f"Bienvenido, {user.name}!")
-              session.close()
 
   return st.session_state.user
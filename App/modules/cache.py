@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from modules.database import _secret
+
+logger = logging.getLogger(__name__)
+
+class TableVersions:
+  """Per-table counters bumped whenever a commit writes to that table.
+
+  Versions are process-local; other replicas' writes are only picked up
+  through the cache TTL.
+  """
+
+  def __init__(self):
+      self._lock = threading.Lock()
+      self._versions = {}
+
+  def get(self, tables):
+      with self._lock:
+          return tuple(self._versions.get(table, 0) for table in tables)
+
+  def bump(self, *tables):
+      with self._lock:
+          for table in tables:
+              self._versions[table] = self._versions.get(table, 0) + 1
+
+table_versions = TableVersions()
+
+class QueryCache:
+  """Size-bounded LRU of query results, invalidated by table versions or TTL."""
+
+  def __init__(self, max_entries=256, ttl=300, versions=table_versions):
+      self.max_entries = max_entries
+      self.ttl = ttl
+      self.versions = versions
+      self._lock = threading.Lock()
+      self._entries = OrderedDict()
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+
+  def get_or_load(self, key, tables, loader):
+      """Return the cached value for `key`, or call `loader()` and cache it.
+
+      `tables` lists every table the query reads; a commit to any of them
+      makes the entry stale.
+      """
+      versions = self.versions.get(tables)
+      now = time.monotonic()
+      with self._lock:
+          entry = self._entries.get(key)
+          if entry is not None and entry[1] == versions and entry[2] > now:
+              self._entries.move_to_end(key)
+              self.hits += 1
+              return entry[0]
+          self.misses += 1
+      value = loader()
+      with self._lock:
+          self._entries[key] = (value, versions, now + self.ttl)
+          self._entries.move_to_end(key)
+          while len(self._entries) > self.max_entries:
+              self._entries.popitem(last=False)
+              self.evictions += 1
+      return value
+
+  def clear(self):
+      with self._lock:
+          self._entries.clear()
+
+  def stats(self):
+      with self._lock:
+          total = self.hits + self.misses
+          return {
+              "entries": len(self._entries),
+              "hits": self.hits,
+              "misses": self.misses,
+              "evictions": self.evictions,
+              "hit_rate": self.hits / total if total else 0.0,
+          }
+
+dashboard_cache = QueryCache(
+  max_entries=int(_secret("cache", "max_entries", 256)),
+  ttl=float(_secret("cache", "ttl", 300)),
+)
+
+# Track which tables each session writes and bump them once the commit lands
+def _touched(session):
+  return session.info.setdefault("touched_tables", set())
+
+def mark_touched(session, *tables):
+  """Record tables written outside the ORM flush, e.g. by a listener's Core upsert."""
+  _touched(session).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+  for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+      table = getattr(type(instance), "__tablename__", None)
+      if table:
+          _touched(session).add(table)
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_tables(orm_execute_state):
+  if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+      table = getattr(orm_execute_state.statement, "table", None)
+      if table is not None:
+          _touched(orm_execute_state.session).add(table.name)
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tables(session):
+  tables = session.info.pop("touched_tables", None)
+  if tables:
+      table_versions.bump(*tables)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tables(session):
+  session.info.pop("touched_tables", None)
@@ -0,0 +1,112 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from modules.database import upsert_increment
+from modules.models import KpiCounter, Order, Product, Subscription, User, keep_previous_values
+
+logger = logging.getLogger(__name__)
+
+counter_table = KpiCounter.__table__
+
+# Row counters maintained per model
+COUNTED_MODELS = {User: "users", Product: "products", Order: "orders", Subscription: "subscriptions"}
+COUNTERS = tuple(COUNTED_MODELS.values()) + ("revenue", "active_subscriptions")
+
+keep_previous_values(Order.total_price, Subscription.is_active)
+
+def _previous(obj, name):
+  history = inspect(obj).attrs[name].history
+  if history.deleted:
+      return history.deleted[0]
+  if history.unchanged:
+      return history.unchanged[0]
+  return getattr(obj, name)
+
+def _contribution(obj, previous=False):
+  """What one row adds to the counters."""
+  value = _previous if previous else getattr
+  contribution = {COUNTED_MODELS[type(obj)]: 1}
+  if isinstance(obj, Order):
+      contribution["revenue"] = value(obj, "total_price") or 0.0
+  elif isinstance(obj, Subscription):
+      contribution["active_subscriptions"] = 1 if value(obj, "is_active") else 0
+  return contribution
+
+def apply_counter_deltas(conn, deltas):
+  for name, delta in deltas.items():
+      if delta:
+          upsert_increment(conn, counter_table, {"name": name}, {"value": delta})
+
+@event.listens_for(Session, "after_flush")
+def _maintain_counters(session, flush_context):
+  deltas = defaultdict(float)
+  for obj in session.new:
+      if type(obj) in COUNTED_MODELS:
+          for name, amount in _contribution(obj).items():
+              deltas[name] += amount
+  for obj in session.deleted:
+      if type(obj) in COUNTED_MODELS:
+          for name, amount in _contribution(obj, previous=True).items():
+              deltas[name] -= amount
+  for obj in session.dirty:
+      if isinstance(obj, (Order, Subscription)):
+          before, after = _contribution(obj, previous=True), _contribution(obj)
+          for name in after:
+              deltas[name] += after[name] - before[name]
+  if any(deltas.values()):
+      apply_counter_deltas(session.connection(), deltas)
+
+def read_counters(session):
+  """Every KPI in one primary-key read; missing counters read as 0."""
+  values = dict(session.execute(
+      select(counter_table.c.name, counter_table.c.value).where(counter_table.c.name.in_(COUNTERS))
+  ).all())
+  return {name: values.get(name, 0) for name in COUNTERS}
+
+def counter_drift(conn):
+  """{name: (stored, actual)} for counters that differ from a recount.
+
+  Recounts and stored values come from one statement, so both sides see the
+  same snapshot even under READ COMMITTED; a write committed during the
+  scans is in neither.
+  """
+  subscriptions = Subscription.__table__
+  actual = {name: select(func.count()).select_from(model.__table__) for model, name in COUNTED_MODELS.items()}
+  actual["revenue"] = select(func.coalesce(func.sum(Order.__table__.c.total_price), 0.0))
+  actual["active_subscriptions"] = select(func.count()).select_from(subscriptions).where(subscriptions.c.is_active.is_(True))
+  columns = []
+  for name, recount in actual.items():
+      stored = select(counter_table.c.value).where(counter_table.c.name == name)
+      columns += [func.coalesce(stored.scalar_subquery(), 0), recount.scalar_subquery()]
+  row = conn.execute(select(*columns)).one()
+  drifted = {}
+  for i, name in enumerate(actual):
+      stored, value = row[2 * i], row[2 * i + 1]
+      if abs(stored - value) > 1e-6:
+          drifted[name] = (stored, value)
+  return drifted
+
+def correct_drift(conn, drifted):
+  # Adjust by the difference rather than overwrite, so deltas committed
+  # since the recount are kept
+  for name, (stored, actual) in drifted.items():
+      upsert_increment(conn, counter_table, {"name": name}, {"value": actual - stored})
+  if drifted:
+      logger.warning("Reconciled KPI counters: %s", drifted)
+
+def reconcile_counters(engine):
+  """Recount every KPI from the source tables and correct drifted values.
+
+  The recount is read on its own and the correction applied in a separate,
+  short transaction. Returns {name: (stored, actual)} for counters that had
+  drifted.
+  """
+  with engine.connect() as conn:
+      drifted = counter_drift(conn)
+  if drifted:
+      with engine.begin() as conn:
+          correct_drift(conn, drifted)
+  return drifted
@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Pool settings used when neither Streamlit secrets nor env vars override them
+POOL_DEFAULTS = {
+  "pool_size": 5,
+  "max_overflow": 10,
+  "pool_timeout": 30,
+  "pool_recycle": 1800,
+  "pool_pre_ping": True,
+}
+
+_registry_lock = threading.Lock()
+_engines = {}
+_sessionmakers = {}
+_pool_stats = {}
+
+class PoolStats:
+  """Thread-safe counters for one engine's connection pool."""
+
+  def __init__(self):
+      self._lock = threading.Lock()
+      self.connects = 0
+      self.checkouts = 0
+      self.checkins = 0
+      self.invalidations = 0
+      self.timeouts = 0
+      self.wait_count = 0
+      self.wait_total = 0.0
+      self.wait_max = 0.0
+
+  def incr(self, name):
+      with self._lock:
+          setattr(self, name, getattr(self, name) + 1)
+
+  def record_wait(self, seconds):
+      with self._lock:
+          self.wait_count += 1
+          self.wait_total += seconds
+          self.wait_max = max(self.wait_max, seconds)
+
+  def snapshot(self):
+      with self._lock:
+          return {
+              "connects": self.connects,
+              "checkouts": self.checkouts,
+              "checkins": self.checkins,
+              "invalidations": self.invalidations,
+              "timeouts": self.timeouts,
+              "wait_avg_ms": (self.wait_total / self.wait_count * 1000) if self.wait_count else 0.0,
+              "wait_max_ms": self.wait_max * 1000,
+          }
+
+class InstrumentedQueuePool(QueuePool):
+  """QueuePool that records how long callers wait for a connection."""
+
+  stats = None
+
+  def _do_get(self):
+      start = time.perf_counter()
+      try:
+          return super()._do_get()
+      except Exception:
+          if self.stats is not None:
+              self.stats.incr("timeouts")
+          raise
+      finally:
+          if self.stats is not None:
+              self.stats.record_wait(time.perf_counter() - start)
+
+def _secret(section, key, default=None):
+  try:
+      return st.secrets[section][key]
+  except (KeyError, FileNotFoundError):
+      return default
+
+def get_database_url():
+  """Resolve the database URL from Streamlit secrets or the environment."""
+  database_url = _secret("database", "url") or os.getenv("DATABASE_URL")
+  if not database_url:
+      st.error("Database URL not found. Please set it in Streamlit secrets or as an environment variable.")
+      logger.error("Database URL not found. Cannot proceed without database access.")
+      st.stop()
+  return database_url
+
+def _debug_mode():
+  try:
+      return bool(st.secrets.get("debug", False))
+  except FileNotFoundError:
+      return os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
+def pool_settings():
+  """Pool settings from `[database]` secrets, then DB_* env vars, then defaults."""
+  settings = {}
+  for key, default in POOL_DEFAULTS.items():
+      value = _secret("database", key)
+      if value is None:
+          value = os.getenv(f"DB_{key.upper()}")
+      if value is None:
+          value = default
+      elif isinstance(default, bool):
+          value = str(value).lower() in ("1", "true", "yes")
+      else:
+          value = int(value)
+      settings[key] = value
+  return settings
+
+def _attach_listeners(engine, stats):
+  event.listen(engine, "connect", lambda dbapi_conn, record: stats.incr("connects"))
+  event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: stats.incr("checkouts"))
+  event.listen(engine, "checkin", lambda dbapi_conn, record: stats.incr("checkins"))
+  event.listen(engine, "invalidate", lambda dbapi_conn, record, exc: stats.incr("invalidations"))
+
+def _build_engine(database_url):
+  stats = PoolStats()
+  kwargs = {"echo": _debug_mode()}
+  if make_url(database_url).get_backend_name() != "sqlite":
+      # Per-engine subclass so the stats survive QueuePool.recreate()
+      kwargs["poolclass"] = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"stats": stats})
+      kwargs.update(pool_settings())
+  engine = create_engine(database_url, **kwargs)
+  _attach_listeners(engine, stats)
+  logger.info("Created engine for %s", make_url(database_url).render_as_string(hide_password=True))
+  return engine, stats
+
+def get_engine(database_url=None):
+  """Return the process-wide engine for `database_url`, creating it on first use."""
+  database_url = database_url or get_database_url()
+  engine = _engines.get(database_url)
+  if engine is None:
+      with _registry_lock:
+          engine = _engines.get(database_url)
+          if engine is None:
+              engine, stats = _build_engine(database_url)
+              _pool_stats[database_url] = stats
+              _sessionmakers[database_url] = sessionmaker(bind=engine)
+              _engines[database_url] = engine
+  return engine
+
+def get_sessionmaker(database_url=None):
+  """Return the shared session factory bound to the registry engine."""
+  database_url = database_url or get_database_url()
+  get_engine(database_url)
+  return _sessionmakers[database_url]
+
+def pool_stats(database_url=None):
+  """Checkout/wait counters plus the live pool status for one engine."""
+  database_url = database_url or get_database_url()
+  engine = get_engine(database_url)
+  snapshot = _pool_stats[database_url].snapshot()
+  pool = engine.pool
+  if isinstance(pool, QueuePool):
+      snapshot.update({
+          "size": pool.size(),
+          "checked_out": pool.checkedout(),
+          "overflow": pool.overflow(),
+          "checked_in": pool.checkedin(),
+      })
+  return snapshot
+
+def upsert_increment(conn, table, keys, increments):
+  """INSERT a row, or add `increments` to the existing row with the same `keys`.
+
+  Uses ON CONFLICT, so it works on PostgreSQL and SQLite >= 3.24.
+  """
+  dialect = conn.dialect.name
+  if dialect == "postgresql":
+      from sqlalchemy.dialects.postgresql import insert
+  elif dialect == "sqlite":
+      from sqlalchemy.dialects.sqlite import insert
+  else:
+      raise NotImplementedError(f"upsert_increment does not support {dialect}")
+  stmt = insert(table).values(**keys, **increments)
+  stmt = stmt.on_conflict_do_update(
+      index_elements=list(keys),
+      set_={column: table.c[column] + stmt.excluded[column] for column in increments},
+  )
+  conn.execute(stmt)
+
+def insert_ignore(conn, table, rows, index_elements):
+  """INSERT `rows`, skipping any that conflict on `index_elements`.
+
+  Returns the `index_elements` values of the rows actually inserted.
+  """
+  if not rows:
+      return []
+  dialect = conn.dialect.name
+  if dialect == "postgresql":
+      from sqlalchemy.dialects.postgresql import insert
+  elif dialect == "sqlite":
+      from sqlalchemy.dialects.sqlite import insert
+  else:
+      raise NotImplementedError(f"insert_ignore does not support {dialect}")
+  stmt = insert(table).on_conflict_do_nothing(index_elements=index_elements).returning(
+      *[table.c[column] for column in index_elements]
+  )
+  return [tuple(row) for row in conn.execute(stmt, rows)]
+
+@contextmanager
+def count_queries(engine=None):
+  """Count statements executed on `engine` inside the block.
+
+      with count_queries() as counter:
+          ...
+      counter["count"]
+  """
+  engine = engine or get_engine()
+  counter = {"count": 0}
+
+  def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+      counter["count"] += 1
+
+  event.listen(engine, "before_cursor_execute", before_cursor_execute)
+  try:
+      yield counter
+  finally:
+      event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def dispose_engines():
+  """Close every pooled connection, e.g. after a fork or in a CLI."""
+  with _registry_lock:
+      for engine in _engines.values():
+          engine.dispose()
+      _engines.clear()
+      _sessionmakers.clear()
+      _pool_stats.clear()
@@ -0,0 +1,124 @@
+import csv
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from modules.models import Order, OrderStatus, User
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "pasto_verde_exports")
+# Export files older than this are deleted whenever a new export starts
+EXPORT_TTL = 3600
+CHUNK_SIZE = 5000
+
+orders = Order.__table__
+users = User.__table__
+
+# (header, column) in file order
+EXPORT_COLUMNS = [
+  ("ID", orders.c.id),
+  ("Usuario", users.c.name),
+  ("Correo", users.c.email),
+  ("Teléfono", orders.c.phone_number),
+  ("Producto/Plan", orders.c.plan_name),
+  ("Cantidad", orders.c.quantity),
+  ("Total", orders.c.total_price),
+  ("Estado", orders.c.status),
+  ("Fecha de Creación", orders.c.created_at),
+  ("Fecha de Entrega", orders.c.delivery_date),
+  ("Horario de Entrega", orders.c.delivery_time),
+  ("Dirección", orders.c.delivery_address),
+  ("Referencias", orders.c.additional_notes),
+  ("Colonia", orders.c.colonia),
+  ("Zona", orders.c.delivery_zone),
+]
+
+def export_query(status=None, start=None, end=None):
+  """Projected orders + customer columns for the export, newest first."""
+  query = select(*[column for _, column in EXPORT_COLUMNS]).select_from(
+      orders.outerjoin(users, users.c.id == orders.c.user_id)
+  )
+  if status is not None:
+      query = query.where(orders.c.status == status)
+  if start is not None and end is not None:
+      query = query.where(orders.c.created_at.between(start, end))
+  return query.order_by(orders.c.created_at.desc(), orders.c.id.desc())
+
+def _chunks(conn, query, chunk_size):
+  # stream_results uses a server-side cursor where the driver has one
+  # (psycopg2 named cursors), so only one chunk is ever held in memory
+  result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+  for partition in result.partitions():
+      yield [tuple(value.value if isinstance(value, OrderStatus) else value for value in row) for row in partition]
+
+def _write_csv(path, chunks):
+  rows = 0
+  with open(path, "w", newline="", encoding="utf-8-sig") as handle:
+      writer = csv.writer(handle)
+      writer.writerow([header for header, _ in EXPORT_COLUMNS])
+      for chunk in chunks:
+          writer.writerows(chunk)
+          rows += len(chunk)
+  return rows
+
+def _parquet_schema():
+  import pyarrow as pa
+  types = {"Cantidad": pa.int64(), "Total": pa.float64(), "Fecha de Creación": pa.timestamp("us"), "Fecha de Entrega": pa.timestamp("us")}
+  return pa.schema([(header, types.get(header, pa.string())) for header, _ in EXPORT_COLUMNS])
+
+def _write_parquet(path, chunks):
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+  schema = _parquet_schema()
+  rows = 0
+  with pq.ParquetWriter(path, schema) as writer:
+      for chunk in chunks:
+          # One row group per chunk
+          columns = list(zip(*chunk))
+          writer.write_table(pa.Table.from_arrays(
+              [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+          ))
+          rows += len(chunk)
+  return rows
+
+WRITERS = {"csv": _write_csv, "parquet": _write_parquet}
+
+def _cleanup(now):
+  for name in os.listdir(EXPORT_DIR):
+      path = os.path.join(EXPORT_DIR, name)
+      try:
+          if now - os.path.getmtime(path) > EXPORT_TTL:
+              os.remove(path)
+      except OSError:
+          pass
+
+def export_orders(engine, fmt="csv", status=None, start=None, end=None, chunk_size=CHUNK_SIZE):
+  """Write filtered orders to a temp file chunk by chunk; returns (path, rows).
+
+  Memory stays at one chunk whatever the number of orders.
+  """
+  os.makedirs(EXPORT_DIR, exist_ok=True)
+  _cleanup(time.time())
+  handle, path = tempfile.mkstemp(prefix=f"ordenes_{datetime.now():%Y%m%d_%H%M%S}_", suffix=f".{fmt}", dir=EXPORT_DIR)
+  os.close(handle)
+  start_time = time.perf_counter()
+  try:
+      with engine.connect() as conn:
+          rows = WRITERS[fmt](path, _chunks(conn, export_query(status, start, end), chunk_size))
+  except Exception:
+      os.remove(path)
+      raise
+  logger.info("Exported %d orders to %s in %.1f s", rows, path, time.perf_counter() - start_time)
+  return path, rows
+
+def take_export(path):
+  """Contents of an export file, deleting it: each export downloads once."""
+  with open(path, "rb") as handle:
+      data = handle.read()
+  os.remove(path)
+  return data
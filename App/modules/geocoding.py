@@ -0,0 +1,221 @@
+import bisect
+import csv
+import difflib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from modules.database import _secret
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAZETTEER_PATH = os.path.join(APP_DIR, "data", "colonias_tegucigalpa.csv")
+DEFAULT_CACHE_PATH = os.path.join(APP_DIR, "geocode_cache.sqlite3")
+
+POSITIVE_TTL = 30 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+# Nominatim's usage policy allows at most one request per second
+REMOTE_MIN_INTERVAL = 1.0
+REMOTE_TIMEOUT = 5.0
+
+GeocodeResult = namedtuple("GeocodeResult", ["lat", "lon", "address", "source"])
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_COLONIA_PREFIX = re.compile(r"^(colonia|col)\s+")
+
+def query_key(text):
+  """Cache/gazetteer key: lowercase, no accents or punctuation, no 'colonia' prefix."""
+  text = unicodedata.normalize("NFKD", text or "")
+  text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+  text = " ".join(_PUNCTUATION.sub(" ", text).split())
+  return _COLONIA_PREFIX.sub("", text)
+
+class Gazetteer:
+  """Offline colonia -> coordinates lookup with exact, prefix and fuzzy matching."""
+
+  def __init__(self, path=GAZETTEER_PATH):
+      self.entries = {}
+      if os.path.exists(path):
+          with open(path, encoding="utf-8") as handle:
+              for row in csv.DictReader(handle):
+                  result = GeocodeResult(float(row["lat"]), float(row["lon"]), f"{row['name']}, Tegucigalpa, Honduras", "gazetteer")
+                  for name in [row["name"]] + [alias for alias in (row.get("aliases") or "").split("|") if alias]:
+                      self.entries[query_key(name)] = result
+      self.keys = sorted(self.entries)
+
+  def exact(self, key):
+      return self.entries.get(key)
+
+  def prefix(self, key, min_length=4):
+      """Entry whose name starts with `key`, if exactly one place matches."""
+      if len(key) < min_length:
+          return None
+      start = bisect.bisect_left(self.keys, key)
+      matches = set()
+      for name in self.keys[start:]:
+          if not name.startswith(key):
+              break
+          matches.add(self.entries[name])
+      return matches.pop() if len(matches) == 1 else None
+
+  def fuzzy(self, key, cutoff=0.85):
+      close = difflib.get_close_matches(key, self.keys, n=1, cutoff=cutoff)
+      return self.entries[close[0]] if close else None
+
+class GeocodeCache:
+  """SQLite-file cache of geocoder answers, including misses (negative caching)."""
+
+  def __init__(self, path=DEFAULT_CACHE_PATH, ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+      self.ttl = ttl
+      self.negative_ttl = negative_ttl
+      self._lock = threading.Lock()
+      self._conn = sqlite3.connect(path, check_same_thread=False)
+      self._conn.execute(
+          "CREATE TABLE IF NOT EXISTS geocode_cache ("
+          " key TEXT PRIMARY KEY, lat REAL, lon REAL, address TEXT, expires_at REAL NOT NULL)"
+      )
+      self._conn.commit()
+
+  def get(self, key):
+      """(hit, result): hit is False when unknown or expired; result None is a cached miss."""
+      with self._lock:
+          row = self._conn.execute(
+              "SELECT lat, lon, address, expires_at FROM geocode_cache WHERE key = ?", (key,)
+          ).fetchone()
+      if row is None or row[3] < time.time():
+          return False, None
+      if row[0] is None:
+          return True, None
+      return True, GeocodeResult(row[0], row[1], row[2], "cache")
+
+  def put(self, key, result):
+      ttl = self.ttl if result else self.negative_ttl
+      values = (key, result.lat, result.lon, result.address) if result else (key, None, None, None)
+      with self._lock:
+          self._conn.execute(
+              "INSERT OR REPLACE INTO geocode_cache (key, lat, lon, address, expires_at) VALUES (?, ?, ?, ?, ?)",
+              values + (time.time() + ttl,),
+          )
+          self._conn.commit()
+
+class Geocoder:
+  """Gazetteer first, then the persistent cache, then Nominatim (rate limited)."""
+
+  def __init__(self, gazetteer=None, cache=None, remote=None):
+      self.gazetteer = gazetteer or Gazetteer()
+      self.cache = cache or GeocodeCache(_secret("geocoding", "cache_path", DEFAULT_CACHE_PATH))
+      self._remote = remote
+      self._remote_lock = threading.Lock()
+      self._last_remote = 0.0
+
+  def _remote_geocode(self, colonia):
+      if self._remote is None:
+          from geopy.geocoders import Nominatim
+          self._remote = Nominatim(user_agent="pasto_verde_app", timeout=REMOTE_TIMEOUT)
+      with self._remote_lock:
+          wait = REMOTE_MIN_INTERVAL - (time.monotonic() - self._last_remote)
+          if wait > 0:
+              time.sleep(wait)
+          try:
+              location = self._remote.geocode(f"{colonia}, Tegucigalpa, Honduras")
+          finally:
+              self._last_remote = time.monotonic()
+      if location is None:
+          return None
+      return GeocodeResult(location.latitude, location.longitude, location.address, "nominatim")
+
+  def geocode_local(self, colonia):
+      """(hit, result) using only the gazetteer and the cache; never touches the network."""
+      key = query_key(colonia)
+      if not key:
+          return True, None
+      result = self.gazetteer.exact(key)
+      if result:
+          return True, result
+      hit, result = self.cache.get(key)
+      if hit:
+          return True, result
+      result = self.gazetteer.prefix(key) or self.gazetteer.fuzzy(key)
+      if result:
+          self.cache.put(key, result)
+          return True, result
+      return False, None
+
+  def geocode_remote(self, colonia):
+      """Ask Nominatim and cache the answer; remote errors propagate and are not cached."""
+      result = self._remote_geocode(colonia)
+      self.cache.put(query_key(colonia), result)
+      return result
+
+  def geocode(self, colonia):
+      """Coordinates for a colonia name, or None when nobody knows it."""
+      hit, result = self.geocode_local(colonia)
+      if hit:
+          return result
+      return self.geocode_remote(colonia)
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+def get_geocoder():
+  global _geocoder
+  if _geocoder is None:
+      with _geocoder_lock:
+          if _geocoder is None:
+              _geocoder = Geocoder()
+  return _geocoder
+
+# Remote lookups run here so a slow geocoder never blocks a script run
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="geocode")
+
+DEBOUNCE_SECONDS = 0.5
+GRACE_SECONDS = 0.3
+REQUEST_TIMEOUT = REMOTE_TIMEOUT + REMOTE_MIN_INTERVAL * 2
+
+def _debounced_remote(geocoder, colonia, superseded):
+  # A newer query during the debounce window wins; this one never hits the network
+  if superseded.wait(DEBOUNCE_SECONDS):
+      return None
+  return geocoder.geocode_remote(colonia)
+
+def geocode_in_background(colonia, state, force=False):
+  """Non-blocking geocode for a Streamlit rerun loop.
+
+  `state` is a per-user dict (e.g. st.session_state.setdefault(...)). Returns
+  (status, result) where status is "done", "pending", "error" or "timeout".
+  A finished remote lookup is picked up by whichever rerun comes next.
+  """
+  request = state.get("request")
+  if request is None or request["query"] != colonia or force:
+      if request is not None:
+          request["superseded"].set()
+          if request["future"] is not None:
+              request["future"].cancel()
+      geocoder = get_geocoder()
+      hit, result = geocoder.geocode_local(colonia)
+      request = {"query": colonia, "future": None, "result": result, "superseded": threading.Event(), "started": time.monotonic()}
+      if not hit:
+          request["future"] = _executor.submit(_debounced_remote, geocoder, colonia, request["superseded"])
+      state["request"] = request
+
+  future = request["future"]
+  if future is None:
+      return "done", request["result"]
+  try:
+      # Fast answers still show up in this run
+      return "done", future.result(timeout=GRACE_SECONDS)
+  except FuturesTimeout:
+      if time.monotonic() - request["started"] > REQUEST_TIMEOUT:
+          request["superseded"].set()
+          return "timeout", None
+      return "pending", None
+  except Exception as e:
+      logger.warning("Geocoding failed for %r: %s", colonia, e)
+      return "error", None
@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+
+from modules.database import _secret
+
+logger = logging.getLogger(__name__)
+
+# 2024-01-01T00:00:00Z in milliseconds; 41 bits of milliseconds last ~69 years
+EPOCH_MS = 1704067200000
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32: no I, L, O or U, so IDs survive being read over the phone
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 13  # ceil(64 / 5)
+
+def encode_base32(value):
+  chars = []
+  for _ in range(ENCODED_LENGTH):
+      value, remainder = divmod(value, 32)
+      chars.append(ALPHABET[remainder])
+  return "".join(reversed(chars))
+
+def decode_base32(text):
+  value = 0
+  for char in text.upper():
+      value = value * 32 + ALPHABET.index(char)
+  return value
+
+def default_node_id():
+  """Node id from `[orders] node_id` / ORDER_ID_NODE.
+
+  IDs are only unique across replicas (app servers and the worker) when each
+  one has its own node id. Without one, `[orders] require_node_id` /
+  ORDER_ID_REQUIRE_NODE makes this an error; otherwise a hashed host+pid is
+  used, which can collide, and a warning is logged.
+  """
+  configured = _secret("orders", "node_id") or os.getenv("ORDER_ID_NODE")
+  if configured is not None:
+      node_id = int(configured)
+      if not 0 <= node_id <= MAX_NODE:
+          raise ValueError(f"Order ID node id must be between 0 and {MAX_NODE}")
+      return node_id
+  message = "No order ID node id configured: set [orders] node_id or ORDER_ID_NODE to a distinct value per replica"
+  if _secret("orders", "require_node_id", False) or os.getenv("ORDER_ID_REQUIRE_NODE"):
+      raise RuntimeError(message)
+  logger.warning("%s. Falling back to a hashed host+pid, which can collide between replicas.", message)
+  digest = hashlib.sha1(f"{socket.gethostname()}:{os.getpid()}".encode()).digest()
+  return int.from_bytes(digest[:2], "big") & MAX_NODE
+
+class SortableIdGenerator:
+  """Timestamp + node + sequence IDs that sort in creation order.
+
+  Fixed-width base32 keeps string comparison equal to numeric comparison,
+  so new rows land at the right edge of the primary key index.
+  """
+
+  def __init__(self, prefix="ORD-", node_id=None, clock=time.time):
+      self.prefix = prefix
+      self.node_id = default_node_id() if node_id is None else node_id
+      self._clock = clock
+      self._lock = threading.Lock()
+      self._last_ms = -1
+      self._sequence = 0
+
+  def _now_ms(self):
+      return int(self._clock() * 1000) - EPOCH_MS
+
+  def next_value(self):
+      with self._lock:
+          # Never go backwards, even if the wall clock does
+          now = max(self._now_ms(), self._last_ms)
+          if now == self._last_ms:
+              self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+              if self._sequence == 0:
+                  # Sequence exhausted for this millisecond: borrow the next one
+                  now += 1
+          else:
+              self._sequence = 0
+          self._last_ms = now
+          return (now << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+  def __call__(self):
+      return f"{self.prefix}{encode_base32(self.next_value())}"
+
+  def parse(self, order_id):
+      """Split an ID back into (created_at_ms, node_id, sequence) for support lookups."""
+      value = decode_base32(order_id[len(self.prefix):])
+      sequence = value & MAX_SEQUENCE
+      node_id = (value >> SEQUENCE_BITS) & MAX_NODE
+      created_at_ms = (value >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS
+      return created_at_ms, node_id, sequence
+
+_generator = None
+_generator_lock = threading.Lock()
+
+def get_id_generator():
+  global _generator
+  if _generator is None:
+      with _generator_lock:
+          if _generator is None:
+              _generator = SortableIdGenerator()
+  return _generator
+
+def set_id_generator(generator):
+  """Swap in any zero-argument callable returning a new order ID."""
+  global _generator
+  with _generator_lock:
+      _generator = generator
@@ -0,0 +1,192 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select, update
+
+from modules.database import _secret, get_engine, upsert_increment
+from modules.models import JobLease
+
+logger = logging.getLogger(__name__)
+
+lease_table = JobLease.__table__
+
+class Job:
+  """A periodic task: `handler(engine)` runs every `interval` seconds on one runner at a time."""
+
+  def __init__(self, name, handler, interval, max_attempts=3, backoff=10.0, lease=None):
+      self.name = name
+      self.handler = handler
+      self.interval = interval
+      self.max_attempts = max_attempts
+      self.backoff = backoff
+      # Renewed every lease / 3 seconds while the job runs
+      self.lease = lease or max(interval, 600)
+
+JOBS = {}
+
+def register_job(name, interval, **options):
+  """Decorator adding a function to the job registry.
+
+      @register_job("advance-order-statuses", interval=900)
+      def advance_order_statuses(engine):
+          ...
+  """
+  def decorator(handler):
+      JOBS[name] = Job(name, handler, interval, **options)
+      return handler
+  return decorator
+
+def runner_id():
+  return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(conn, job, owner, now):
+  """Claim `job` if it is due and nobody holds an unexpired lease on it.
+
+  One conditional UPDATE decides the winner, so any number of replicas can
+  race for the same job.
+  """
+  upsert_increment(conn, lease_table, {"name": job.name}, {"run_count": 0})
+  result = conn.execute(
+      update(lease_table)
+      .where(
+          lease_table.c.name == job.name,
+          or_(lease_table.c.next_run_at.is_(None), lease_table.c.next_run_at <= now),
+          or_(lease_table.c.lease_expires_at.is_(None), lease_table.c.lease_expires_at < now),
+      )
+      .values(owner=owner, lease_expires_at=now + timedelta(seconds=job.lease))
+  )
+  return result.rowcount == 1
+
+def renew_lease(conn, job, owner, now):
+  """Extend a lease this runner still holds; False if it was lost."""
+  result = conn.execute(
+      update(lease_table)
+      .where(lease_table.c.name == job.name, lease_table.c.owner == owner)
+      .values(lease_expires_at=now + timedelta(seconds=job.lease))
+  )
+  return result.rowcount == 1
+
+def finish_lease(conn, job, owner, started_at, duration_ms, error=None):
+  """Record the run, schedule the next one and release the lease."""
+  conn.execute(
+      update(lease_table)
+      .where(lease_table.c.name == job.name, lease_table.c.owner == owner)
+      .values(
+          owner=None,
+          lease_expires_at=None,
+          next_run_at=started_at + timedelta(seconds=job.interval),
+          last_started_at=started_at,
+          last_finished_at=datetime.utcnow(),
+          last_duration_ms=duration_ms,
+          total_duration_ms=lease_table.c.total_duration_ms + duration_ms,
+          last_status="failed" if error else "ok",
+          last_error=str(error)[:500] if error else None,
+          run_count=lease_table.c.run_count + 1,
+          failure_count=lease_table.c.failure_count + (1 if error else 0),
+      )
+  )
+
+class JobRunner:
+  """Polls the registry and runs due jobs whose lease this process wins."""
+
+  def __init__(self, engine=None, jobs=None, owner=None, poll_interval=None):
+      self.engine = engine or get_engine()
+      self.jobs = JOBS if jobs is None else jobs
+      self.owner = owner or runner_id()
+      self.poll_interval = float(poll_interval or _secret("jobs", "poll_interval", 5))
+      self._stop = threading.Event()
+
+  def _attempt(self, job):
+      for attempt in range(1, job.max_attempts + 1):
+          try:
+              job.handler(self.engine)
+              return None
+          except Exception as e:
+              logger.exception("Job %s failed (attempt %d/%d)", job.name, attempt, job.max_attempts)
+              if attempt == job.max_attempts:
+                  return e
+              if self._stop.wait(job.backoff * 2 ** (attempt - 1)):
+                  return e
+
+  def _heartbeat(self, job, done):
+      # Renew well before expiry so a slow job keeps its lease; a second
+      # runner can only take over once this process stops renewing
+      while not done.wait(job.lease / 3):
+          try:
+              with self.engine.begin() as conn:
+                  if not renew_lease(conn, job, self.owner, datetime.utcnow()):
+                      logger.error("Job %s lost its lease while running", job.name)
+                      return
+          except Exception:
+              logger.exception("Could not renew the lease of job %s", job.name)
+
+  def run_job(self, job):
+      """Run `job` if this runner wins its lease; returns False when it did not run."""
+      started_at = datetime.utcnow()
+      with self.engine.begin() as conn:
+          if not acquire_lease(conn, job, self.owner, started_at):
+              return False
+      done = threading.Event()
+      heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), name=f"lease-{job.name}", daemon=True)
+      heartbeat.start()
+      start = time.perf_counter()
+      try:
+          error = self._attempt(job)
+      finally:
+          done.set()
+          heartbeat.join()
+      duration_ms = (time.perf_counter() - start) * 1000
+      with self.engine.begin() as conn:
+          finish_lease(conn, job, self.owner, started_at, duration_ms, error)
+      logger.info("Job %s %s in %.1f ms", job.name, "failed" if error else "finished", duration_ms)
+      return True
+
+  def run_pending(self):
+      """Run every due job once; returns the names that ran here."""
+      ran = []
+      for job in list(self.jobs.values()):
+          if self._stop.is_set():
+              break
+          try:
+              if self.run_job(job):
+                  ran.append(job.name)
+          except Exception:
+              # Lease bookkeeping failed (e.g. database down); try again next poll
+              logger.exception("Could not run job %s", job.name)
+      return ran
+
+  def run_forever(self):
+      for signum in (signal.SIGINT, signal.SIGTERM):
+          signal.signal(signum, lambda *_: self.stop())
+      logger.info("Job runner %s started with %s", self.owner, ", ".join(self.jobs) or "no jobs")
+      while not self._stop.is_set():
+          self.run_pending()
+          self._stop.wait(self.poll_interval)
+      logger.info("Job runner %s stopped", self.owner)
+
+  def stop(self):
+      self._stop.set()
+
+def job_status(session):
+  """Every job's lease row, for admin pages."""
+  return session.execute(select(lease_table).order_by(lease_table.c.name)).all()
+
+@register_job("advance-order-statuses", interval=900)
+def advance_order_statuses(engine):
+  from modules.transitions import sweep_order_statuses
+  sweep_order_statuses(engine)
+
+@register_job("renew-subscriptions", interval=24 * 3600, lease=3600)
+def renew_subscriptions(engine):
+  from modules.renewals import renew_subscriptions
+  renew_subscriptions(engine)
+
+@register_job("reconcile-counters", interval=6 * 3600)
+def reconcile_counters(engine):
+  from modules.counters import reconcile_counters
+  reconcile_counters(engine)
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, or_, update
+
+from modules.models import User
+
+logger = logging.getLogger(__name__)
+
+# A crash loses at most this many seconds of last_login values
+FLUSH_INTERVAL = 60.0
+# Flush early once this many users are waiting
+MAX_PENDING = 500
+
+class LastLoginBuffer:
+  """Write-behind buffer for users.last_login.
+
+  Logins only record (user id -> time) in memory; a daemon thread writes
+  everything pending in one batched UPDATE every `interval` seconds, or
+  sooner once `max_pending` users are waiting. Repeated logins by a user
+  between flushes cost a single write.
+  """
+
+  def __init__(self, engine, interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+      self.engine = engine
+      self.interval = interval
+      self.max_pending = max_pending
+      self._pending = {}
+      self._lock = threading.Lock()
+      self._wake = threading.Event()
+      self._thread = None
+      self.stats = {"recorded": 0, "written": 0, "flushes": 0}
+
+  def record(self, user_id, when=None):
+      when = when or datetime.utcnow()
+      with self._lock:
+          self._pending[user_id] = max(self._pending.get(user_id, when), when)
+          self.stats["recorded"] += 1
+          if self._thread is None:
+              self._thread = threading.Thread(target=self._run, name="last-login-flush", daemon=True)
+              self._thread.start()
+          if len(self._pending) >= self.max_pending:
+              self._wake.set()
+
+  def flush(self):
+      """Write every pending value now; returns the number of users written."""
+      with self._lock:
+          batch, self._pending = self._pending, {}
+      if not batch:
+          return 0
+      users = User.__table__
+      start = time.perf_counter()
+      try:
+          with self.engine.begin() as conn:
+              # Never move last_login backwards, e.g. behind another process's flush
+              conn.execute(
+                  update(users)
+                  .where(users.c.id == bindparam("user_key"))
+                  .where(or_(users.c.last_login.is_(None), users.c.last_login < bindparam("login_at")))
+                  .values(last_login=bindparam("login_at")),
+                  [{"user_key": user_id, "login_at": when} for user_id, when in batch.items()],
+              )
+      except Exception:
+          logger.exception("Could not write last_login for %d users; will retry", len(batch))
+          with self._lock:
+              for user_id, when in batch.items():
+                  self._pending[user_id] = max(self._pending.get(user_id, when), when)
+          return 0
+      with self._lock:
+          self.stats["written"] += len(batch)
+          self.stats["flushes"] += 1
+      logger.info("Wrote last_login for %d users in %.1f ms", len(batch), (time.perf_counter() - start) * 1000)
+      return len(batch)
+
+  def _run(self):
+      while True:
+          self._wake.wait(self.interval)
+          self._wake.clear()
+          self.flush()
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+def last_login_buffer(engine):
+  """The process-wide buffer for `engine`."""
+  buffer = _buffers.get(engine)
+  if buffer is None:
+      with _buffers_lock:
+          buffer = _buffers.setdefault(engine, LastLoginBuffer(engine))
+  return buffer
+
+@atexit.register
+def flush_last_logins():
+  for buffer in list(_buffers.values()):
+      buffer.flush()
@@ -1,86 +1,31 @@
 import folium
 from folium.plugins import MarkerCluster
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 from jinja2 import Template
 from folium import MacroElement
 import streamlit as st
+from modules.zones import DELIVERY_ZONES, TEGUCIGALPA_COORDS
+from modules.map_cache import render_map_html
 
-def display_map():
-  st.subheader("🗺️ Zona de Entrega")
-  st.subheader("Envíos gratis 🚚📦")
-  
-  # Coordinates for Tegucigalpa
-  tegucigalpa_coords = [14.0818, -87.2068]
-  
+ZOOM_START = 12
+MAP_HEIGHT = 500
+
+LEGEND_HTML = '''
+  {% macro html(this, kwargs) %}
+  <div style="position: fixed; bottom: 50px; left: 50px; width: 120px; height: 160px; 
+  border:2px solid grey; z-index:9999; font-size:14px; background-color:white;
+  ">&nbsp;<b>Leyenda:</b><br>
+  {% for zone, color in this.zones.items() %} 
+  &nbsp;<i class="fa fa-map-marker" style="color:{{ color }}"></i>&nbsp;{{ zone }}<br>
+  {% endfor %}
+  </div>
+  {% endmacro %}
+  '''
+
+def build_zone_map():
   # Create a map centered on Tegucigalpa
-  m = folium.Map(location=tegucigalpa_coords, zoom_start=12)
-  
-  # Define delivery zones (adjusted to reduce overlap)
-  zones = {
-      "Zona 5": {
-          "coordinates": [
-              [14.1300, -87.2800],
-              [14.1300, -87.1450],
-              [14.0950, -87.1450],
-              [14.0950, -87.2800]
-          ],
-          "color": "#00FF00"  # Green
-      },
-      "Zona 3": {
-          "coordinates": [
-              [14.0950, -87.2200],
-              [14.0950, -87.1850],
-              [14.0600, -87.1850],
-              [14.0600, -87.2200]
-          ],
-          "color": "#FF0000"  # Red
-      },
-      "Zona 4": {
-          "coordinates": [
-              [14.0950, -87.1850],
-              [14.0950, -87.1400],
-              [14.0600, -87.1400],
-              [14.0600, -87.1850]
-          ],
-          "color": "#FFFF00"  # Yellow
-      },
-      "Zona 2": {
-          "coordinates": [
-              [14.0950, -87.2800],
-              [14.0950, -87.2200],
-              [14.0600, -87.2200],
-              [14.0600, -87.2800]
-          ],
-          "color": "#FF00FF"  # Magenta
-      },
-      "Zona 1": {
-          "coordinates": [
-              [14.0600, -87.2800],  # Extended left boundary
-              [14.0600, -87.1600],  # Extended right boundary
-              [14.0300, -87.1600],  # Bottom right
-              [14.0300, -87.2800]   # Bottom left
-          ],
-          "color": "#0000FF"  # Blue
-      },
-      "Zona 6": {
-          "coordinates": [
-         [14.1100, -87.1450],  # Santa Lucía
-         [14.1100, -87.0650],
-         [14.1400, -87.0650],
-         [14.1400, -87.1450]
-     ],
-          "color": "#FFA500"  # Orange
-      },
-      "Zona 7": {
-          "coordinates": [
-         [14.1350, -87.0650],  # Valle de Ángeles
-         [14.1350, -87.0299],
-         [14.1800, -87.0299],
-         [14.1800, -87.0650]
-     ],
-          "color": "#800080"  # Purple
-      }
-  }
+  m = folium.Map(location=TEGUCIGALPA_COORDS, zoom_start=ZOOM_START)
+  zones = DELIVERY_ZONES
   
   # Add polygons for each zone
   for zone_name, zone_data in zones.items():
@@ -94,22 +39,23 @@ def display_map():
       ).add_to(m)
   
   # Add legend to the map
-  legend_html = '''
-  <div style="position: fixed; bottom: 50px; left: 50px; width: 120px; height: 160px; 
-  border:2px solid grey; z-index:9999; font-size:14px; background-color:white;
-  ">&nbsp;<b>Leyenda:</b><br>
-  {% for zone, color in zones.items() %} 
-  &nbsp;<i class="fa fa-map-marker" style="color:{{ color }}"></i>&nbsp;{{ zone }}<br>
-  {% endfor %}
-  </div>
-  '''
-  legend_template = Template(legend_html)
   macro = MacroElement()
-  macro._template = legend_template
+  macro._template = Template(LEGEND_HTML)
+  macro.zones = {zone_name: zone_data["color"] for zone_name, zone_data in zones.items()}
   m.get_root().add_child(macro)
-  
-  # Display the map
-  folium_static(m)
+  return m
+
+def display_map():
+  st.subheader("🗺️ Zona de Entrega")
+  st.subheader("Envíos gratis 🚚📦")
+
+  # Served from the rendered-HTML cache unless the zone configuration changed
+  html, render_ms, cached = render_map_html(
+      {"map": "zones", "zones": DELIVERY_ZONES, "center": TEGUCIGALPA_COORDS, "zoom": ZOOM_START, "legend": LEGEND_HTML},
+      build_zone_map
+  )
+  components.html(html, height=MAP_HEIGHT)
+  st.caption(f"Mapa {'en caché' if cached else 'renderizado'} en {render_ms:.0f} ms")
 
   # Add message about ©Pasto Verde Boxes
   st.markdown("### 📦 ©Pasto Verde Boxes")
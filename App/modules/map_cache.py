@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import urljoin, urlparse
+
+import folium
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(APP_DIR, ".map_cache")
+# Served by Streamlit at /app/static/... (server.enableStaticServing)
+VENDOR_DIR = os.path.join(APP_DIR, "static", "vendor")
+VENDOR_URL = "/app/static/vendor"
+
+# Bump when the rendering code changes in a way the payload does not capture
+MAP_CACHE_VERSION = 1
+MAX_ENTRIES = 64
+# .map_cache/ keeps at most this many files, none older than MAX_DISK_AGE seconds
+MAX_DISK_ENTRIES = 512
+MAX_DISK_AGE = 7 * 24 * 3600
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+def content_hash(payload):
+  """Stable hash of everything that determines a map's HTML."""
+  encoded = json.dumps([MAP_CACHE_VERSION, payload], sort_keys=True, default=str)
+  return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _asset_path(name, url):
+  return os.path.join(VENDOR_DIR, name, posixpath.basename(urlparse(url).path))
+
+def vendored_assets():
+  """Names of folium's default assets that have a vendored copy."""
+  return sorted(
+      name for name, url in folium.Map.default_js + folium.Map.default_css if os.path.exists(_asset_path(name, url))
+  )
+
+def use_local_assets(m):
+  """Point a map's JS/CSS at vendored copies where `manage.py vendor-map-assets` fetched them."""
+  def localize(assets):
+      localized = []
+      for name, url in assets:
+          if os.path.exists(_asset_path(name, url)):
+              url = f"{VENDOR_URL}/{name}/{posixpath.basename(urlparse(url).path)}"
+          localized.append((name, url))
+      return localized
+  m.default_js = localize(m.default_js)
+  m.default_css = localize(m.default_css)
+  return m
+
+def _prune_disk_cache(now):
+  try:
+      entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(".html")]
+  except FileNotFoundError:
+      return
+  entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+  for i, entry in enumerate(entries):
+      if i >= MAX_DISK_ENTRIES or now - entry.stat().st_mtime > MAX_DISK_AGE:
+          try:
+              os.remove(entry.path)
+          except OSError:
+              pass
+
+def _read_disk_entry(path):
+  try:
+      with open(path, encoding="utf-8") as handle:
+          html = handle.read()
+      # Recently served files survive pruning
+      os.utime(path)
+  except FileNotFoundError:
+      return None
+  return html or None
+
+def _write_disk_entry(path, html):
+  # Written aside and renamed into place, so a concurrent reader sees either
+  # no file or the whole page
+  os.makedirs(CACHE_DIR, exist_ok=True)
+  fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+  try:
+      with os.fdopen(fd, "w", encoding="utf-8") as handle:
+          handle.write(html)
+      os.replace(tmp_path, path)
+  except OSError:
+      logger.warning("Could not write map cache file %s", path, exc_info=True)
+      try:
+          os.remove(tmp_path)
+      except OSError:
+          pass
+
+def render_map_html(payload, build):
+  """HTML for the map `build()` creates, cached by the hash of `payload`.
+
+  Returns (html, render_ms, cached). Entries live in memory (LRU) and in
+  .map_cache/ so a restarted process does not re-render either. The key
+  includes which assets are vendored, so running `vendor-map-assets`
+  invalidates HTML that still points at the CDNs.
+  """
+  key = content_hash({"payload": payload, "vendored": vendored_assets()})
+  start = time.perf_counter()
+  with _lock:
+      html = _entries.get(key)
+      if html is not None:
+          _entries.move_to_end(key)
+  path = os.path.join(CACHE_DIR, f"{key}.html")
+  if html is None:
+      html = _read_disk_entry(path)
+  cached = html is not None
+  if html is None:
+      html = use_local_assets(build()).get_root().render()
+      _write_disk_entry(path, html)
+      _prune_disk_cache(time.time())
+  with _lock:
+      _entries[key] = html
+      _entries.move_to_end(key)
+      while len(_entries) > MAX_ENTRIES:
+          _entries.popitem(last=False)
+  render_ms = (time.perf_counter() - start) * 1000
+  logger.info("Map %s %s in %.1f ms", key[:12], "served from cache" if cached else "rendered", render_ms)
+  return html, render_ms, cached
+
+_CSS_URL = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)")
+
+def _download(url, path):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with urllib.request.urlopen(url, timeout=30) as response, open(path, "wb") as handle:
+      data = response.read()
+      handle.write(data)
+  return data
+
+def vendor_map_assets():
+  """Download folium's default JS/CSS, plus files the CSS references, into static/vendor."""
+  fetched = []
+  for name, url in folium.Map.default_js + folium.Map.default_css:
+      path = _asset_path(name, url)
+      data = _download(url, path)
+      fetched.append(path)
+      if not path.endswith(".css"):
+          continue
+      # Fonts and images referenced relatively from the stylesheet
+      for ref in set(_CSS_URL.findall(data.decode("utf-8", "replace"))):
+          if ref.startswith(("data:", "#")) or urlparse(ref).scheme:
+              continue
+          relative = urlparse(ref).path
+          target = os.path.normpath(os.path.join(os.path.dirname(path), relative))
+          if not target.startswith(VENDOR_DIR + os.sep):
+              logger.warning("Skipping %s referenced from %s: outside vendor dir", ref, url)
+              continue
+          _download(urljoin(url, relative), target)
+          fetched.append(target)
+  return fetched
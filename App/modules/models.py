@@ -1,9 +1,10 @@
-import streamlit as st
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, ForeignKey, Enum, Boolean
+from sqlalchemy import event, func, Column, Integer, String, Date, DateTime, Float, ForeignKey, Enum, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, validates
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import enum
+from modules.database import get_engine, get_sessionmaker
+import modules.cache  # registers commit -> table version tracking
 
 Base = declarative_base()
 
@@ -26,12 +27,22 @@ class User(Base):
   email = Column(String, unique=True, nullable=False)
   type = Column(Enum(UserType), nullable=False)
   address = Column(String)
+  colonia = Column(String, nullable=True)
   phone_number = Column(String, nullable=True)
   created_at = Column(DateTime, default=datetime.utcnow)
   last_login = Column(DateTime)
   is_active = Column(Boolean, default=True)
   orders = relationship("Order", back_populates="user")
 
+  __table_args__ = (
+      # Keyset pagination in the admin user listing
+      Index("ix_users_created_at_id", created_at, id),
+      Index("ix_users_colonia", colonia),
+      # Type-ahead pickers match prefixes case-insensitively
+      Index("ix_users_email_lower", func.lower(email)),
+      Index("ix_users_name_lower", func.lower(name)),
+  )
+
   @validates('email')
   def validate_email(self, key, address):
       assert '@' in address
@@ -48,6 +59,10 @@ class Product(Base):
   created_at = Column(DateTime, default=datetime.utcnow)
   updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
+  __table_args__ = (
+      Index("ix_products_name_lower", func.lower(name)),
+  )
+
 class Order(Base):
   __tablename__ = 'orders'
   id = Column(String, primary_key=True)
@@ -69,7 +84,33 @@ class Order(Base):
   delivery_time = Column(String)
   phone_number = Column(String, nullable=True)
   additional_notes = Column(String)
-  
+  # Normalized at checkout so analytics can group without parsing addresses
+  colonia = Column(String, nullable=True)
+  delivery_zone = Column(String, nullable=True)
+  delivery_lat = Column(Float, nullable=True)
+  delivery_lon = Column(Float, nullable=True)
+  # Subscription deliveries: cycle 0 is the checkout order, later cycles are renewals
+  subscription_id = Column(Integer, ForeignKey('subscriptions.id'), nullable=True)
+  cycle = Column(Integer, nullable=True)
+  subscription = relationship("Subscription")
+
+  __table_args__ = (
+      # "Mis Órdenes": WHERE user_id = ? ORDER BY created_at DESC
+      Index("ix_orders_user_id_created_at", user_id, created_at.desc()),
+      # Analytics range scans on created_at
+      Index("ix_orders_created_at", created_at),
+      # Status sweeps: WHERE status = ? AND updated_at < ?
+      Index("ix_orders_status_updated_at", status, updated_at),
+      Index("ix_orders_colonia", colonia),
+      Index("ix_orders_delivery_zone_created_at", delivery_zone, created_at),
+      # Route planning: orders due on a delivery date
+      Index("ix_orders_delivery_date", delivery_date),
+      # Network view: latest orders of a plan or product
+      Index("ix_orders_plan_name_created_at", plan_name, created_at),
+      Index("ix_orders_product_id_created_at", product_id, created_at),
+      # One order per subscription cycle, so renewals can be re-run safely
+      Index("ix_orders_subscription_id_cycle", subscription_id, cycle, unique=True),
+  )
 
   def calculate_total_price(self):
       return self.quantity * self.product.price
@@ -84,6 +125,12 @@ class Subscription(Base):
   is_active = Column(Boolean, default=True)
   user = relationship("User")
 
+  __table_args__ = (
+      Index("ix_subscriptions_user_id", user_id),
+      # Keyset pagination in the admin subscription listing
+      Index("ix_subscriptions_start_date_id", start_date, id),
+  )
+
 class PaymentTransaction(Base):
   __tablename__ = 'payment_transactions'
   id = Column(Integer, primary_key=True)
@@ -94,17 +141,73 @@ class PaymentTransaction(Base):
   payment_method = Column(String)
   order = relationship("Order")
 
+class OrderDailyRollup(Base):
+  """Orders per day x status x plan x zone x product, kept in step with the orders table."""
+  __tablename__ = 'order_daily_rollups'
+  day = Column(Date, primary_key=True)
+  status = Column(Enum(OrderStatus), primary_key=True)
+  plan_name = Column(String, primary_key=True, default="")
+  zone = Column(String, primary_key=True, default="")
+  # 0 for orders without a product
+  product_id = Column(Integer, primary_key=True, default=0)
+  order_count = Column(Integer, nullable=False, default=0)
+  revenue = Column(Float, nullable=False, default=0.0)
+
+class DeliverySlot(Base):
+  """Boxes booked per delivery day x zone x slot; capacity comes from configuration."""
+  __tablename__ = 'delivery_slots'
+  day = Column(Date, primary_key=True)
+  zone = Column(String, primary_key=True, default="")
+  slot = Column(String, primary_key=True)
+  reserved = Column(Integer, nullable=False, default=0)
+
+class KpiCounter(Base):
+  """Running totals for the admin overview, kept in step with writes."""
+  __tablename__ = 'kpi_counters'
+  name = Column(String, primary_key=True)
+  value = Column(Float, nullable=False, default=0.0)
+
+class JobLease(Base):
+  """Schedule, lease and last-run metrics of one background job, shared by all runners."""
+  __tablename__ = 'job_leases'
+  name = Column(String, primary_key=True)
+  owner = Column(String)
+  lease_expires_at = Column(DateTime)
+  next_run_at = Column(DateTime)
+  last_started_at = Column(DateTime)
+  last_finished_at = Column(DateTime)
+  last_duration_ms = Column(Float)
+  total_duration_ms = Column(Float, nullable=False, default=0.0)
+  last_status = Column(String)
+  last_error = Column(String)
+  run_count = Column(Integer, nullable=False, default=0)
+  failure_count = Column(Integer, nullable=False, default=0)
+
+def _keep_previous(target, value, oldvalue, initiator):
+  pass
+
+def keep_previous_values(*attributes):
+  """Load the old value when these attributes are assigned.
+
+  Assigning to an expired attribute (e.g. after a commit) otherwise skips the
+  load, and flush listeners would see no previous value to move counts from.
+  """
+  for attribute in attributes:
+      event.listen(attribute, "set", _keep_previous, active_history=True)
+
 def setup_database():
-  try:
-      database_url = st.secrets["database"]["url"]
-      debug_mode = st.secrets.get("debug", False)  # Default to False if not specified
-  except KeyError:
-      st.error("Database URL not found in Streamlit secrets. Please check your configuration.")
-      st.stop()
-
-  engine = create_engine(database_url, echo=debug_mode)
-  Base.metadata.create_all(engine)
-  return sessionmaker(bind=engine)
-
-# Initialize the SessionLocal
-SessionLocal = setup_database()
+  from modules.schema import ensure_schema
+  engine = get_engine()
+  ensure_schema(engine)
+  return get_sessionmaker()
+
+def SessionLocal():
+  """Open a session on the shared engine; nothing connects until first call."""
+  return setup_database()()
+
+# Session listeners that keep the derived tables in step with every write.
+# Imported last because they import the models above; any code that can
+# open a session has imported this module, so none can miss them.
+import modules.rollups  # noqa: E402,F401  incremental rollup maintenance
+import modules.slots  # noqa: E402,F401  delivery slot reservations
+import modules.counters  # noqa: E402,F401  KPI counter maintenance
@@ -0,0 +1,177 @@
+import math
+import zlib
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, load_only
+
+from modules.cache import dashboard_cache
+from modules.models import Order, OrderDailyRollup, Product, Subscription, User
+
+# The browser stays responsive up to a few hundred nodes
+MAX_NODES = 400
+EXPAND_LIMIT = 25
+UNZONED = "Sin zona"
+
+def _node(node_id, label, name, **data):
+  return {"data": {"id": node_id, "label": label, "name": name, **data}}
+
+def _edge(source, target, label, **data):
+  return {"data": {"id": f"{source}>{target}", "source": source, "target": target, "label": label, **data}}
+
+# Expanders return (node, edge label, direction) with direction "out" for
+# parent -> neighbor edges, e.g. user -PLACED-> order -CONTAINS-> product
+
+def _ring(elements, radius, offset=0.0, center=(0.0, 0.0)):
+  for i, element in enumerate(elements):
+      angle = offset + 2 * math.pi * i / max(len(elements), 1)
+      element["position"] = {"x": center[0] + radius * math.cos(angle), "y": center[1] + radius * math.sin(angle)}
+
+def _load_seed(session):
+  zone_plan = session.query(
+      OrderDailyRollup.zone, OrderDailyRollup.plan_name, func.sum(OrderDailyRollup.order_count)
+  ).group_by(OrderDailyRollup.zone, OrderDailyRollup.plan_name).all()
+  plan_product = session.query(
+      OrderDailyRollup.plan_name, OrderDailyRollup.product_id, func.sum(OrderDailyRollup.order_count)
+  ).group_by(OrderDailyRollup.plan_name, OrderDailyRollup.product_id).all()
+  products = session.query(Product.id, Product.name).all()
+
+  zones, plans, edges = {}, {}, []
+  for zone, plan_name, count in zone_plan:
+      if not count:
+          continue
+      zone_id, plan_id = f"zone:{zone}", f"plan:{plan_name}"
+      zones[zone_id] = zones.get(zone_id, 0) + count
+      plans[plan_id] = plans.get(plan_id, 0) + count
+      edges.append(_edge(zone_id, plan_id, "ORDERS", count=count))
+  product_nodes = [_node(f"product:{product_id}", "PRODUCT", name) for product_id, name in products]
+  product_ids = {node["data"]["id"] for node in product_nodes}
+  for plan_name, product_id, count in plan_product:
+      plan_id, product = f"plan:{plan_name}", f"product:{product_id}"
+      if count and plan_id in plans and product in product_ids:
+          edges.append(_edge(plan_id, product, "CONTAINS", count=count))
+
+  zone_nodes = [_node(node_id, "ZONE", node_id[5:] or UNZONED, orders=count) for node_id, count in sorted(zones.items())]
+  plan_nodes = [_node(node_id, "PLAN", node_id[5:] or "Sin plan", orders=count) for node_id, count in sorted(plans.items())]
+  # Preset layout: zones inside, plans around them, products outside
+  _ring(zone_nodes, 150)
+  _ring(plan_nodes, 350, offset=math.pi / 8)
+  _ring(product_nodes, 550, offset=math.pi / 4)
+  return zone_nodes + plan_nodes + product_nodes, edges
+
+def seed_graph(session):
+  """Aggregated zone/plan/product graph with a precomputed layout.
+
+  Read from the daily rollups and cached until they or the products change,
+  so the seed never scans orders.
+  """
+  nodes, edges = dashboard_cache.get_or_load(
+      ("network_seed",), ("order_daily_rollups", "products"), lambda: _load_seed(session)
+  )
+  return {
+      "nodes": {node["data"]["id"]: {**node, "data": dict(node["data"]), "position": dict(node["position"])} for node in nodes},
+      "edges": {edge["data"]["id"]: edge for edge in edges},
+      "expanded": set(),
+  }
+
+def _order_node(order):
+  return _node(f"order:{order.id}", "ORDER", order.id, status=order.status.value, total_price=order.total_price)
+
+def _user_node(user):
+  return _node(f"user:{user.id}", "USER", user.name, email=user.email)
+
+def _latest_orders(session, column, value, limit):
+  # Empty keys stand for NULL: rollups store missing zones/plans as ""
+  return session.query(Order).options(
+      load_only(Order.id, Order.status, Order.total_price, Order.created_at)
+  ).filter(column.is_(None) if value in (None, "") else column == value).order_by(Order.created_at.desc()).limit(limit).all()
+
+def _expand_zone(session, zone, limit):
+  return [(_order_node(order), "IN_ZONE", "in") for order in _latest_orders(session, Order.delivery_zone, zone, limit)]
+
+def _expand_plan(session, plan_name, limit):
+  return [(_order_node(order), "FOR_PLAN", "in") for order in _latest_orders(session, Order.plan_name, plan_name, limit)]
+
+def _expand_product(session, product_id, limit):
+  return [(_order_node(order), "CONTAINS", "in") for order in _latest_orders(session, Order.product_id, int(product_id), limit)]
+
+def _expand_user(session, user_id, limit):
+  orders = _latest_orders(session, Order.user_id, user_id, limit)
+  subscriptions = session.query(Subscription).filter(Subscription.user_id == user_id).limit(limit).all()
+  return [(_order_node(order), "PLACED", "out") for order in orders] + [
+      (_node(f"sub:{sub.id}", "SUBSCRIPTION", sub.plan_name, is_active=sub.is_active), "SUBSCRIBED", "out")
+      for sub in subscriptions
+  ]
+
+def _expand_order(session, order_id, limit):
+  order = session.query(Order).options(
+      joinedload(Order.user).load_only(User.name, User.email),
+      joinedload(Order.product).load_only(Product.name),
+  ).filter(Order.id == order_id).first()
+  if order is None:
+      return []
+  related = []
+  if order.user:
+      related.append((_user_node(order.user), "PLACED", "in"))
+  if order.product:
+      related.append((_node(f"product:{order.product.id}", "PRODUCT", order.product.name), "CONTAINS", "out"))
+  related.append((_node(f"plan:{order.plan_name or ''}", "PLAN", order.plan_name or "Sin plan"), "FOR_PLAN", "out"))
+  related.append((_node(f"zone:{order.delivery_zone or ''}", "ZONE", order.delivery_zone or UNZONED), "IN_ZONE", "out"))
+  return related
+
+def _expand_sub(session, sub_id, limit):
+  sub = session.query(Subscription).options(
+      joinedload(Subscription.user).load_only(User.name, User.email)
+  ).filter(Subscription.id == int(sub_id)).first()
+  if sub is None or sub.user is None:
+      return []
+  return [(_user_node(sub.user), "SUBSCRIBED", "in")]
+
+EXPANDERS = {
+  "zone": _expand_zone,
+  "plan": _expand_plan,
+  "product": _expand_product,
+  "user": _expand_user,
+  "order": _expand_order,
+  "sub": _expand_sub,
+}
+
+def expand_node(session, graph, node_id, limit=EXPAND_LIMIT, max_nodes=MAX_NODES):
+  """Add up to `limit` neighbors of `node_id` to `graph` with one or two indexed queries.
+
+  New nodes are placed on a ring around the expanded node so the preset
+  layout never has to be recomputed. Returns (added, capped).
+  """
+  kind, _, key = node_id.partition(":")
+  room = max_nodes - len(graph["nodes"])
+  if kind not in EXPANDERS or node_id not in graph["nodes"]:
+      return 0, False
+  if room <= 0:
+      return 0, True
+  related = EXPANDERS[kind](session, key, min(limit, room))
+  parent = graph["nodes"][node_id]
+  new_nodes = []
+  for node, label, direction in related:
+      related_id = node["data"]["id"]
+      if related_id not in graph["nodes"]:
+          if len(new_nodes) >= room:
+              continue
+          graph["nodes"][related_id] = node
+          new_nodes.append(node)
+      edge = _edge(node_id, related_id, label) if direction == "out" else _edge(related_id, node_id, label)
+      graph["edges"][edge["data"]["id"]] = edge
+  center = (parent["position"]["x"], parent["position"]["y"])
+  _ring(new_nodes, 60 + 4 * len(new_nodes), offset=zlib.crc32(node_id.encode()) % 360 * math.pi / 180, center=center)
+  graph["expanded"].add(node_id)
+  return len(new_nodes), len(related) > len(new_nodes) and len(graph["nodes"]) >= max_nodes
+
+def remove_nodes(graph, node_ids):
+  for node_id in node_ids:
+      graph["nodes"].pop(node_id, None)
+      graph["expanded"].discard(node_id)
+  graph["edges"] = {
+      edge_id: edge for edge_id, edge in graph["edges"].items()
+      if edge["data"]["source"] in graph["nodes"] and edge["data"]["target"] in graph["nodes"]
+  }
+
+def elements(graph):
+  return {"nodes": list(graph["nodes"].values()), "edges": list(graph["edges"].values())}
@@ -1,42 +1,26 @@
 import streamlit as st
 from datetime import datetime
-import random
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func
 import folium
-from streamlit_folium import folium_static
-from geopy.geocoders import Nominatim
 from branca.element import Template, MacroElement
 import streamlit.components.v1 as components
-from modules.models import User, Product, Order, Subscription, PaymentTransaction, OrderStatus, UserType
-from dotenv import load_dotenv
-import os
+from modules.models import User, Product, Order, Subscription, PaymentTransaction, OrderStatus, UserType, setup_database
+from modules.ids import get_id_generator
+from modules.addresses import location_fields
+from modules.geocoding import geocode_in_background
+from modules.map_cache import render_map_html
+from modules.slots import SlotUnavailable, available_slots
+from modules.renewals import plan_end_date
+from modules.zones import zone_for_point
 
-# If you're using any secrets or environment variables
-load_dotenv()
-
-# Database setup (if needed in this file)
-try:
-    database_url = st.secrets["database"]["url"]
-except KeyError:
-    database_url = os.getenv("DATABASE_URL")
-
-if not database_url:
-    st.error("Database URL not found. Please set it in Streamlit secrets or as an environment variable.")
-    st.stop()
-
-# Setup database session
-engine = create_engine(database_url)
-Session = sessionmaker(bind=engine)
+WEEKDAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
 
 # Helper functions
 def generate_order_id():
-    return f"ORD-{random.randint(10000, 99999)}"
+    return get_id_generator()()
 
 def place_order():
     st.subheader("🛒 Realizar pedido")
-    session = Session()
-
     # Plan options
     plans = {
         "Suscripción Anual": {
@@ -113,27 +97,42 @@ def place_order():
     if 'search_result' not in st.session_state:
         st.session_state.search_result = None
 
-    # Address search
-    if search_button or (colonia and st.session_state.get('last_search') != colonia):
-        st.session_state['last_search'] = colonia
-        geolocator = Nominatim(user_agent="pasto_verde_app")
-        try:
-            search_query = f"{colonia}, Tegucigalpa, Honduras"
-            location = geolocator.geocode(search_query)
-            if location:
-                st.session_state.map_center = [location.latitude, location.longitude]
+    # Address search; remote lookups finish in the background
+    geocode_state = st.session_state.setdefault('geocode_state', {})
+    if colonia:
+        status, location = geocode_in_background(colonia, geocode_state, force=search_button)
+        request = geocode_state['request']
+        if status == "pending":
+            st.info("Buscando colonia...")
+
+            @st.fragment(run_every=1.0)
+            def wait_for_geocode():
+                if request["future"].done():
+                    st.rerun()
+
+            wait_for_geocode()
+        elif not request.get('shown'):
+            request['shown'] = True
+            if status == "done" and location:
+                st.session_state.map_center = [location.lat, location.lon]
                 st.session_state.search_result = location.address
                 st.success(f"Colonia encontrada: {location.address}")
-            else:
+            elif status == "done":
                 st.error("No se pudo encontrar la colonia.")
-        except Exception as e:
-            st.error(f"Error en el servicio de geolocalización: {str(e)}")
+            elif status == "timeout":
+                st.error("El servicio de geolocalización tardó demasiado. Intenta de nuevo con el botón Buscar.")
+            else:
+                st.error("Error en el servicio de geolocalización. Intenta de nuevo más tarde.")
+
+    # Create map; cached by center so keystroke reruns reuse the rendered HTML
+    def build_checkout_map():
+        m = folium.Map(location=st.session_state.map_center, zoom_start=15)
+        marker = folium.Marker(st.session_state.map_center, draggable=True)
+        marker.add_to(m)
+        return m
 
-    # Create map
-    m = folium.Map(location=st.session_state.map_center, zoom_start=15)
-    marker = folium.Marker(st.session_state.map_center, draggable=True)
-    marker.add_to(m)
-    folium_static(m)
+    map_html, _, _ = render_map_html({"map": "checkout", "center": st.session_state.map_center, "zoom": 15}, build_checkout_map)
+    components.html(map_html, height=500)
 
     # Specific address details
     specific_address = st.text_input("Número de casa y calle", value="")
@@ -148,10 +147,21 @@ def place_order():
     user_full_name = st.text_input("Nombre completo", value=st.session_state.user.name)
     user_email = st.text_input("Correo electrónico", value=st.session_state.user.email)
     user_phone = st.text_input("Número de teléfono", value="")
-    delivery_date = st.date_input("Fecha de entrega", value=datetime.today())
-
-    # Delivery Time Frame Selection
-    delivery_time_frame = st.radio("Horario de entrega Lunes a Sabado:", ("AM (7am - 12pm)"))
+    # Delivery day and slot from the capacity counters of the customer's zone
+    delivery_zone = zone_for_point(*st.session_state.map_center) if st.session_state.search_result else None
+    slot_session = setup_database()()
+    try:
+        slot_options = [option for option in available_slots(slot_session, delivery_zone) if option[2] > 0]
+    finally:
+        slot_session.close()
+    if not slot_options:
+        st.error("No hay horarios de entrega disponibles en tu zona para las próximas dos semanas.")
+        return
+    delivery_date, delivery_time_frame, _ = st.selectbox(
+        "Fecha y horario de entrega (Lunes a Sábado):",
+        slot_options,
+        format_func=lambda option: f"{WEEKDAYS[option[0].weekday()]} {option[0].strftime('%d/%m/%Y')} - {option[1]} ({option[2]} cupos)",
+    )
 
     # Promo Code Input and Disclaimer
     promo_code = st.text_input("Código promocional (opcional)", value="")
@@ -191,6 +201,18 @@ def place_order():
             st.write("**Nota:** En el checkout, se incluye una caja de madera con los planes de suscripción. One-time setup fee")
 
     if st.button("Confirmar pedido"):
+        # The DB session only lives for the write, not the whole form
+        Session = setup_database()
+        session = Session()
+        # Coordinates only mean something once the colonia was geocoded
+        if st.session_state.search_result:
+            lat, lon = st.session_state.map_center
+        else:
+            lat = lon = None
+        colonia_name = colonia
+        if not colonia_name and st.session_state.search_result:
+            colonia_name = st.session_state.search_result.split(",")[0]
+        location = location_fields(colonia_name, lat, lon)
         new_order = Order(
             id=generate_order_id(),
             user_id=st.session_state.user.id,
@@ -201,24 +223,44 @@ def place_order():
             total_price=total_price,
             plan_name=selected_plan,
             delivery_time=delivery_time_frame,
-            delivery_date=delivery_date,
+            delivery_date=datetime.combine(delivery_date, datetime.min.time()),
             phone_number=user_phone,
-            additional_notes=additional_references
+            additional_notes=additional_references,
+            **location
         )
-        session.add(new_order)
-          
-        if selected_plan != "Sin Suscripción":
-            new_subscription = Subscription(
-                user_id=st.session_state.user.id,
-                plan_name=selected_plan,
-                start_date=datetime.utcnow(),
-                is_active=True
-            )
-            session.add(new_subscription)
-        
-        session.commit()
+        order_id = new_order.id
+
+        try:
+            session.add(new_order)
+            if selected_plan != "Sin Suscripción":
+                start_date = datetime.utcnow()
+                new_subscription = Subscription(
+                    user_id=st.session_state.user.id,
+                    plan_name=selected_plan,
+                    start_date=start_date,
+                    end_date=plan_end_date(selected_plan, start_date),
+                    is_active=True
+                )
+                session.add(new_subscription)
+                # The checkout order is cycle 0; renewals copy its delivery details
+                new_order.subscription = new_subscription
+                new_order.cycle = 0
+            if location["colonia"]:
+                # Query.update autoflushes the order, which reserves its slot,
+                # so a full slot can already raise here
+                session.query(User).filter(User.id == st.session_state.user.id).update(
+                    {User.colonia: location["colonia"]}, synchronize_session=False
+                )
+            # The slot is reserved in the same transaction as the order
+            session.commit()
+        except SlotUnavailable:
+            session.rollback()
+            st.error("El horario seleccionado se llenó mientras realizabas tu pedido. Por favor elige otro.")
+            return
+        finally:
+            session.close()
           
-        st.success(f"*Pedido Procesando⌛* Por favor confirmar el pago para coordinar la entrega de su orden. Numero de pedido: {new_order.id}")
+        st.success(f"*Pedido Procesando⌛* Por favor confirmar el pago para coordinar la entrega de su orden. Numero de pedido: {order_id}")
 
         # Trigger the balloon animation
         st.balloons()
@@ -353,5 +395,3 @@ def place_order():
             </script>
             '''
             components.html(paypal_html, height=300)
-
-    session.close()
@@ -0,0 +1,56 @@
+import streamlit as st
+from sqlalchemy import tuple_
+
+PAGE_SIZE_OPTIONS = (25, 50, 100, 200)
+
+def keyset_page(query, sort_columns, after=None, page_size=50, descending=True):
+  """One page of `query` ordered by `sort_columns`, starting after the `after` cursor.
+
+  `sort_columns` must end in a unique column (usually the primary key) so the
+  cursor identifies exactly one row. Returns (rows, next_cursor); next_cursor
+  is None on the last page.
+  """
+  keys = tuple_(*sort_columns)
+  if after is not None:
+      query = query.filter(keys < tuple_(*after) if descending else keys > tuple_(*after))
+  order = [column.desc() if descending else column.asc() for column in sort_columns]
+  rows = query.order_by(*order).limit(page_size + 1).all()
+  if len(rows) <= page_size:
+      return rows, None
+  rows = rows[:page_size]
+  return rows, tuple(getattr(rows[-1], column.key) for column in sort_columns)
+
+def paginated_listing(key, query, sort_columns, filters=(), label="registros"):
+  """Streamlit pager over `query` using keyset pagination.
+
+  `filters` is any hashable summary of the server-side filters already
+  applied to `query`; when it changes the pager jumps back to page one.
+  Returns the rows of the current page.
+  """
+  state = st.session_state.setdefault(f"{key}_pager", {"filters": None, "cursors": [None]})
+
+  col1, col2 = st.columns(2)
+  with col1:
+      page_size = st.selectbox("Filas por página", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_page_size")
+  with col2:
+      newest_first = st.radio("Orden", ["Más recientes", "Más antiguos"], horizontal=True, key=f"{key}_order") == "Más recientes"
+
+  signature = (filters, page_size, newest_first)
+  if state["filters"] != signature:
+      state["filters"] = signature
+      state["cursors"] = [None]
+
+  rows, next_cursor = keyset_page(query, sort_columns, state["cursors"][-1], page_size, descending=newest_first)
+
+  page_number = len(state["cursors"])
+  st.caption(f"Página {page_number} · {len(rows)} {label}")
+  col1, col2 = st.columns(2)
+  with col1:
+      if st.button("⬅️ Anterior", key=f"{key}_prev", disabled=page_number == 1):
+          state["cursors"].pop()
+          st.rerun()
+  with col2:
+      if st.button("Siguiente ➡️", key=f"{key}_next", disabled=next_cursor is None):
+          state["cursors"].append(next_cursor)
+          st.rerun()
+  return rows
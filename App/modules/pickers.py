@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+import streamlit as st
+from sqlalchemy import func
+
+from modules.models import Order, Product, Subscription, User
+
+PICKER_LIMIT = 10
+
+# keys: (indexed expression, term normalizer) pairs tried in order
+# by_id: integer primary keys also match an exact numeric term
+Picker = namedtuple("Picker", "keys label join by_id", defaults=(None, False))
+
+def _order_id_prefix(term):
+  term = term.upper()
+  return term if term.startswith("ORD-") or "ORD-".startswith(term) else f"ORD-{term}"
+
+PICKERS = {
+  User: Picker(
+      keys=((func.lower(User.email), str.lower), (func.lower(User.name), str.lower)),
+      label=lambda user: f"{user.name} · {user.email}",
+  ),
+  Product: Picker(
+      keys=((func.lower(Product.name), str.lower),),
+      label=lambda product: f"{product.name} (ID {product.id})",
+      by_id=True,
+  ),
+  Order: Picker(
+      keys=((Order.id, _order_id_prefix),),
+      label=lambda order: f"{order.id} · {order.status.value.capitalize()}",
+  ),
+  Subscription: Picker(
+      keys=((func.lower(User.email), str.lower), (func.lower(User.name), str.lower)),
+      label=lambda sub: f"#{sub.id} · {sub.plan_name} · {sub.user.name if sub.user else 'N/A'}",
+      join=Subscription.user,
+      by_id=True,
+  ),
+}
+
+def _primary_key(model):
+  return model.__mapper__.primary_key[0]
+
+def _prefix_filter(expression, prefix):
+  # The range is what a plain b-tree index on `expression` answers; startswith
+  # drops rows a linguistic collation sorts into the range without the prefix
+  upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+  return expression >= prefix, expression < upper, expression.startswith(prefix, autoescape=True)
+
+def _picker_query(session, model, query=None):
+  query = query if query is not None else session.query(model)
+  picker = PICKERS[model]
+  return query.join(picker.join) if picker.join is not None else query
+
+def picker_matches(session, model, term, limit=PICKER_LIMIT, query=None):
+  """Up to `limit` rows of `model` whose picker keys start with `term`.
+
+  One indexed range query per key, each stopping at `limit` rows, so the
+  cost does not depend on the table size. Ties are broken by primary key so
+  the order is the same on every rerun. `query` may carry loader options.
+  """
+  picker = PICKERS[model]
+  term = term.strip()
+  if not term:
+      return []
+  query = _picker_query(session, model, query)
+  primary_key = _primary_key(model)
+  matches = []
+  if picker.by_id and term.isdigit():
+      matches.extend(query.filter(model.id == int(term)).all())
+  for expression, normalize in picker.keys:
+      if len(matches) >= limit:
+          break
+      for row in query.filter(*_prefix_filter(expression, normalize(term))).order_by(expression, primary_key).limit(limit).all():
+          if row not in matches:
+              matches.append(row)
+  return matches[:limit]
+
+def entity_picker(session, model, label, key, query=None, limit=PICKER_LIMIT, empty_text="Sin coincidencias."):
+  """Type-ahead picker: a text box plus the first matches.
+
+  Returns the selected entity, already loaded, or None. The choice is kept
+  by primary key, so the row shown is the row returned on the next rerun
+  even if other rows now match ahead of it.
+  """
+  term = st.text_input(label, key=f"{key}_term")
+  if not term.strip():
+      return None
+  primary_key = _primary_key(model)
+  # One selection per term: typing a different term starts a new choice
+  choice_key = f"{key}_choice_{term.strip()}"
+  rows = {getattr(row, primary_key.key): row for row in picker_matches(session, model, term, limit, query)}
+  selected = st.session_state.get(choice_key)
+  if selected is not None and selected not in rows:
+      row = _picker_query(session, model, query).filter(primary_key == selected).first()
+      if row is not None:
+          rows = {selected: row, **rows}
+  if not rows:
+      st.caption(empty_text)
+      return None
+  describe = PICKERS[model].label
+  selected = st.selectbox(
+      label, list(rows), format_func=lambda pk: describe(rows[pk]),
+      key=choice_key, label_visibility="collapsed",
+  )
+  return rows[selected]
@@ -0,0 +1,38 @@
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from modules.models import Order, Product, Subscription, User
+
+# Named loader profiles: each listing declares up front which relationships
+# and columns it reads, so N rows cost a constant number of round trips.
+ORDER_PROFILES = {
+  # Admin order table: every order column plus the customer's name/email
+  "admin_orders": lambda: (
+      joinedload(Order.user).load_only(User.name, User.email),
+  ),
+  # Dashboard "recent orders" rows
+  "recent_orders": lambda: (
+      load_only(Order.id, Order.status, Order.total_price, Order.created_at),
+      joinedload(Order.user).load_only(User.name),
+  ),
+  # Route planner stop lists show the customer's name
+  "route_stops": lambda: (
+      joinedload(Order.user).load_only(User.name),
+  ),
+  # "Mis Órdenes": the user is already known, only the product name is shown
+  "customer_orders": lambda: (
+      selectinload(Order.product).load_only(Product.name),
+  ),
+}
+
+SUBSCRIPTION_PROFILES = {
+  "admin_subscriptions": lambda: (
+      joinedload(Subscription.user, innerjoin=True).load_only(User.name),
+  ),
+}
+
+def order_query(session, profile):
+  """`session.query(Order)` with the loader options of a named profile."""
+  return session.query(Order).options(*ORDER_PROFILES[profile]())
+
+def subscription_query(session, profile):
+  return session.query(Subscription).options(*SUBSCRIPTION_PROFILES[profile]())
@@ -0,0 +1,201 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select, update
+
+from modules.cache import table_versions
+from modules.counters import apply_counter_deltas
+from modules.database import get_engine, insert_ignore, upsert_increment
+from modules.ids import get_id_generator
+from modules.models import Order, OrderStatus, Subscription
+from modules.rollups import apply_deltas
+from modules.slots import DELIVERY_WEEKDAYS, slot_table
+
+logger = logging.getLogger(__name__)
+
+# "Entrega cada dos semanas"
+DELIVERY_CYCLE = timedelta(days=14)
+PLAN_DURATIONS = {
+  "Suscripción Anual": timedelta(days=365),
+  "Suscripción Semestral": timedelta(days=182),
+  "Suscripción Mensual": timedelta(days=30),
+}
+# Orders are generated this far ahead so they show up in slots and routes
+LEAD_TIME = timedelta(days=3)
+CHUNK_SIZE = 1000
+
+# Copied from the checkout order onto every renewal
+TEMPLATE_COLUMNS = (
+  "user_id", "product_id", "quantity", "delivery_address", "plan_name", "delivery_time",
+  "phone_number", "additional_notes", "colonia", "delivery_zone", "delivery_lat", "delivery_lon",
+)
+
+def plan_end_date(plan_name, start_date):
+  duration = PLAN_DURATIONS.get(plan_name)
+  return start_date + duration if duration else None
+
+def cycle_date(start_date, cycle):
+  """Delivery day of a cycle, moved forward off non-delivery weekdays."""
+  day = start_date + DELIVERY_CYCLE * cycle
+  while day.weekday() not in DELIVERY_WEEKDAYS:
+      day += timedelta(days=1)
+  return datetime.combine(day.date(), datetime.min.time())
+
+def expire_subscriptions(conn, now):
+  subscriptions = Subscription.__table__
+  return conn.execute(
+      update(subscriptions)
+      .where(subscriptions.c.is_active.is_(True), subscriptions.c.end_date <= now)
+      .values(is_active=False)
+  ).rowcount
+
+def _templates(conn, chunk):
+  """Checkout order per subscription (cycle 0).
+
+  Subscriptions sold before orders carried subscription_id adopt the user's
+  latest unlinked order for the plan as their cycle 0, so the lookup is only
+  needed once.
+  """
+  orders = Order.__table__
+  columns = [orders.c[name] for name in TEMPLATE_COLUMNS]
+  templates = {
+      row.subscription_id: row
+      for row in conn.execute(select(orders.c.subscription_id, *columns).where(
+          orders.c.subscription_id.in_([sub.id for sub in chunk]), orders.c.cycle == 0
+      ))
+  }
+  legacy = [sub for sub in chunk if sub.id not in templates]
+  if not legacy:
+      return templates
+  latest = {}
+  for row in conn.execute(
+      select(orders.c.id, *columns)
+      .where(orders.c.user_id.in_({sub.user_id for sub in legacy}), orders.c.subscription_id.is_(None))
+      .order_by(orders.c.created_at.desc())
+  ):
+      latest.setdefault((row.user_id, row.plan_name), row)
+  adopted = []
+  for sub in legacy:
+      row = latest.pop((sub.user_id, sub.plan_name), None)
+      if row is not None:
+          templates[sub.id] = row
+          adopted.append({"order_id": row.id, "sub_id": sub.id})
+  if adopted:
+      conn.execute(
+          update(orders).where(orders.c.id == bindparam("order_id")).values(subscription_id=bindparam("sub_id"), cycle=0),
+          adopted,
+      )
+  return templates
+
+def _renew_chunk(conn, chunk, now, backfill):
+  orders = Order.__table__
+  subscriptions = Subscription.__table__
+  horizon = now + LEAD_TIME
+  today = datetime.combine(now.date(), datetime.min.time())
+
+  # Plans sold before end_date was recorded
+  missing_end = [{"sub_id": sub.id, "new_end": plan_end_date(sub.plan_name, sub.start_date)}
+                 for sub in chunk if sub.end_date is None and sub.plan_name in PLAN_DURATIONS]
+  for row in missing_end:
+      row["still_active"] = row["new_end"] > now
+  if missing_end:
+      conn.execute(
+          update(subscriptions).where(subscriptions.c.id == bindparam("sub_id"))
+          .values(end_date=bindparam("new_end"), is_active=bindparam("still_active")),
+          missing_end,
+      )
+  end_dates = {row["sub_id"]: row["new_end"] for row in missing_end}
+
+  last_cycles = dict(conn.execute(
+      select(orders.c.subscription_id, func.max(orders.c.cycle))
+      .where(orders.c.subscription_id.in_([sub.id for sub in chunk]))
+      .group_by(orders.c.subscription_id)
+  ).all())
+  templates = _templates(conn, chunk)
+  new_id = get_id_generator()
+
+  rows = []
+  skipped = 0
+  for sub in chunk:
+      template = templates.get(sub.id)
+      if template is None:
+          skipped += 1
+          continue
+      end_date = sub.end_date or end_dates.get(sub.id)
+      # Backfill revisits every cycle so gaps behind the latest one are filled;
+      # insert_ignore skips the cycles that already exist
+      cycle = 1 if backfill else (last_cycles.get(sub.id) or 0) + 1
+      while True:
+          delivery_date = cycle_date(sub.start_date, cycle)
+          if delivery_date > horizon or (end_date and delivery_date >= end_date):
+              break
+          # Without backfill, cycles whose day already passed are left alone
+          if backfill or delivery_date >= today:
+              values = {name: getattr(template, name) for name in TEMPLATE_COLUMNS}
+              values.update(
+                  id=new_id(), user_id=sub.user_id, plan_name=sub.plan_name,
+                  subscription_id=sub.id, cycle=cycle, delivery_date=delivery_date,
+                  status=OrderStatus.pending, total_price=0.0, payment_status="paid",
+                  date=now, created_at=now,
+              )
+              rows.append(values)
+          cycle += 1
+  if skipped:
+      logger.warning("%d subscriptions have no order to renew from", skipped)
+
+  inserted = set(insert_ignore(conn, orders, rows, ["subscription_id", "cycle"]))
+  created = [row for row in rows if (row["subscription_id"], row["cycle"]) in inserted]
+
+  # Core inserts skip the ORM listeners, so keep rollups and slot counters in step.
+  # Renewals are commitments already sold, so slots are booked without a capacity check.
+  rollups = defaultdict(lambda: [0, 0.0])
+  slots = defaultdict(int)
+  for row in created:
+      rollups[(now.date(), OrderStatus.pending, row["plan_name"] or "", row["delivery_zone"] or "", row["product_id"] or 0)][0] += 1
+      if row["delivery_time"]:
+          slots[(row["delivery_date"].date(), row["delivery_zone"] or "", row["delivery_time"])] += 1
+  apply_deltas(conn, dict(rollups))
+  for (day, zone, slot), count in slots.items():
+      upsert_increment(conn, slot_table, {"day": day, "zone": zone, "slot": slot}, {"reserved": count})
+  expired = sum(not row["still_active"] for row in missing_end)
+  apply_counter_deltas(conn, {"orders": len(created), "active_subscriptions": -expired})
+  return len(created), expired
+
+def renew_subscriptions(engine=None, now=None, backfill=False, chunk_size=CHUNK_SIZE):
+  """Expire ended plans and create the due delivery orders of every active subscription.
+
+  Walks subscriptions by id in chunks, one transaction each, so it can be
+  interrupted and re-run: the unique (subscription_id, cycle) index makes
+  already generated cycles a no-op. `backfill=True` also creates cycles
+  whose delivery day is in the past. Returns counts for logging.
+  """
+  engine = engine or get_engine()
+  now = now or datetime.utcnow()
+  subscriptions = Subscription.__table__
+  start = time.perf_counter()
+  stats = {"expired": 0, "scanned": 0, "created": 0}
+  with engine.begin() as conn:
+      stats["expired"] = expire_subscriptions(conn, now)
+      apply_counter_deltas(conn, {"active_subscriptions": -stats["expired"]})
+  last_id = 0
+  while True:
+      with engine.begin() as conn:
+          chunk = conn.execute(
+              select(subscriptions.c.id, subscriptions.c.user_id, subscriptions.c.plan_name,
+                     subscriptions.c.start_date, subscriptions.c.end_date)
+              .where(subscriptions.c.id > last_id, subscriptions.c.is_active.is_(True))
+              .order_by(subscriptions.c.id).limit(chunk_size)
+          ).all()
+          if not chunk:
+              break
+          last_id = chunk[-1].id
+          stats["scanned"] += len(chunk)
+          created, expired = _renew_chunk(conn, chunk, now, backfill)
+          stats["created"] += created
+          stats["expired"] += expired
+  if stats["expired"] or stats["created"]:
+      table_versions.bump(Order.__tablename__, Subscription.__tablename__, "order_daily_rollups")
+  logger.info("Subscription renewal in %.1f s: %s", time.perf_counter() - start, stats)
+  return stats
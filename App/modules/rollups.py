@@ -0,0 +1,118 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import delete, event, func, inspect, insert, literal, select
+from sqlalchemy.orm import Session
+
+from modules.cache import mark_touched
+from modules.database import upsert_increment
+from modules.models import Order, OrderDailyRollup, keep_previous_values
+
+logger = logging.getLogger(__name__)
+
+rollup_table = OrderDailyRollup.__table__
+
+# Order attributes that decide which rollup row an order counts towards
+TRACKED_ATTRIBUTES = ("created_at", "status", "plan_name", "delivery_zone", "product_id", "total_price")
+keep_previous_values(*[getattr(Order, name) for name in TRACKED_ATTRIBUTES])
+
+def _key(values):
+  created_at = values["created_at"]
+  return (
+      created_at.date() if created_at else None,
+      values["status"],
+      values["plan_name"] or "",
+      values["delivery_zone"] or "",
+      values["product_id"] or 0,
+  )
+
+def _current_values(order):
+  return {name: getattr(order, name) for name in TRACKED_ATTRIBUTES}
+
+def _previous_values(order):
+  state = inspect(order)
+  values = {}
+  for name in TRACKED_ATTRIBUTES:
+      history = state.attrs[name].history
+      if history.deleted:
+          values[name] = history.deleted[0]
+      elif history.unchanged:
+          values[name] = history.unchanged[0]
+      else:
+          values[name] = getattr(order, name)
+  return values
+
+def collect_deltas(new=(), changed=(), deleted=()):
+  """Per rollup key (count, revenue) deltas for a batch of order writes."""
+  deltas = defaultdict(lambda: [0, 0.0])
+
+  def add(values, sign):
+      key = _key(values)
+      if key[0] is None or key[1] is None:
+          return
+      deltas[key][0] += sign
+      deltas[key][1] += sign * (values["total_price"] or 0.0)
+
+  for order in new:
+      add(_current_values(order), 1)
+  for order in changed:
+      before, after = _previous_values(order), _current_values(order)
+      if before != after:
+          add(before, -1)
+          add(after, 1)
+  for order in deleted:
+      add(_previous_values(order), -1)
+  return {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+def apply_deltas(conn, deltas):
+  for (day, status, plan_name, zone, product_id), (count, revenue) in deltas.items():
+      upsert_increment(
+          conn, rollup_table,
+          {"day": day, "status": status, "plan_name": plan_name, "zone": zone, "product_id": product_id},
+          {"order_count": count, "revenue": revenue},
+      )
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollups(session, flush_context):
+  # Attribute history still holds the pre-flush values here, and the python
+  # side created_at default has already been applied to new orders
+  new = [obj for obj in session.new if isinstance(obj, Order)]
+  changed = [obj for obj in session.dirty if isinstance(obj, Order)]
+  deleted = [obj for obj in session.deleted if isinstance(obj, Order)]
+  if not (new or changed or deleted):
+      return
+  deltas = collect_deltas(new, changed, deleted)
+  if deltas:
+      apply_deltas(session.connection(), deltas)
+      mark_touched(session, rollup_table.name)
+
+def rebuild_rollups(conn, by_zone=True):
+  """Recompute every rollup row from the orders table; returns rows written.
+
+  `by_zone=False` leaves zone empty, for databases that predate the
+  orders.delivery_zone column.
+  """
+  orders = Order.__table__
+  day = func.date(orders.c.created_at)
+  plan_name = func.coalesce(orders.c.plan_name, "")
+  zone = func.coalesce(orders.c.delivery_zone, "") if by_zone else literal("")
+  product_id = func.coalesce(orders.c.product_id, 0)
+  grouped = select(
+      day, orders.c.status, plan_name, zone, product_id,
+      func.count(orders.c.id), func.coalesce(func.sum(orders.c.total_price), 0.0),
+  ).where(orders.c.created_at.isnot(None)).group_by(day, orders.c.status, plan_name, zone, product_id)
+  conn.execute(delete(rollup_table))
+  result = conn.execute(insert(rollup_table).from_select(
+      ["day", "status", "plan_name", "zone", "product_id", "order_count", "revenue"], grouped
+  ))
+  logger.info("Rebuilt order rollups: %s rows", result.rowcount)
+  return result.rowcount
+
+def rollup_query(session, start_date, end_date, *group_by):
+  """Summed order_count and revenue over [start_date, end_date] grouped by rollup columns."""
+  columns = [getattr(OrderDailyRollup, name) for name in group_by]
+  return session.query(
+      *columns,
+      func.sum(OrderDailyRollup.order_count).label("order_count"),
+      func.sum(OrderDailyRollup.revenue).label("revenue"),
+  ).filter(OrderDailyRollup.day.between(start_date, end_date)).group_by(*columns)
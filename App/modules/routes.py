@@ -0,0 +1,114 @@
+import logging
+import time
+from datetime import datetime
+
+import numpy as np
+
+from modules.models import Order, OrderStatus
+from modules.queries import order_query
+from modules.zones import TEGUCIGALPA_COORDS, get_zone_engine
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+UNZONED = "Sin zona"
+
+def haversine_matrix(lats, lons):
+  """Pairwise great-circle distances in km (float32 to keep big matrices small)."""
+  lat = np.radians(np.asarray(lats, dtype=np.float64))
+  lon = np.radians(np.asarray(lons, dtype=np.float64))
+  dlat = lat[:, None] - lat[None, :]
+  dlon = lon[:, None] - lon[None, :]
+  a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+  return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(np.float32)
+
+def nearest_neighbor_tour(distances, start=0):
+  n = len(distances)
+  visited = np.zeros(n, dtype=bool)
+  tour = np.empty(n, dtype=np.int64)
+  tour[0] = current = start
+  visited[start] = True
+  for position in range(1, n):
+      row = np.where(visited, np.inf, distances[current])
+      current = int(np.argmin(row))
+      tour[position] = current
+      visited[current] = True
+  return tour
+
+def two_opt(distances, tour, time_limit=5.0):
+  """Improve a closed tour (tour[0] fixed) with 2-opt moves until no gain or out of time.
+
+  For each i the best j is found in one vectorized pass over the tour.
+  """
+  tour = np.asarray(tour).copy()
+  n = len(tour)
+  if n < 4:
+      return tour
+  deadline = time.perf_counter() + time_limit
+  improved = True
+  while improved and time.perf_counter() < deadline:
+      improved = False
+      for i in range(1, n - 1):
+          closed = np.append(tour, tour[0])
+          a, b = closed[i - 1], closed[i]
+          c = closed[i + 1:n]
+          e = closed[i + 2:n + 1]
+          gains = distances[a, c] + distances[b, e] - distances[a, b] - distances[c, e]
+          best = int(np.argmin(gains))
+          if gains[best] < -1e-6:
+              j = i + 1 + best
+              tour[i:j + 1] = tour[i:j + 1][::-1]
+              improved = True
+          if time.perf_counter() >= deadline:
+              break
+  return tour
+
+def tour_length(distances, tour):
+  closed = np.append(tour, tour[0])
+  return float(distances[closed[:-1], closed[1:]].sum())
+
+def solve_route(lats, lons, depot=TEGUCIGALPA_COORDS, time_limit=5.0):
+  """Stop order (indices into lats/lons) for one vehicle leaving and returning to `depot`.
+
+  Returns (order, km).
+  """
+  all_lats = np.concatenate([[depot[0]], lats])
+  all_lons = np.concatenate([[depot[1]], lons])
+  distances = haversine_matrix(all_lats, all_lons)
+  tour = two_opt(distances, nearest_neighbor_tour(distances), time_limit)
+  return tour[1:] - 1, tour_length(distances, tour)
+
+def plan_routes(session, delivery_date, depot=TEGUCIGALPA_COORDS, time_limit=5.0):
+  """Routes per delivery zone for every non-cancelled order due on `delivery_date`.
+
+  Returns {zone: {"stops": [Order, ...], "km": float}} plus the orders that
+  have no coordinates under the key None.
+  """
+  start = datetime.combine(delivery_date, datetime.min.time())
+  end = datetime.combine(delivery_date, datetime.max.time())
+  orders = order_query(session, "route_stops").filter(
+      Order.delivery_date.between(start, end),
+      Order.status != OrderStatus.cancelled,
+  ).all()
+
+  located = [order for order in orders if order.delivery_lat is not None and order.delivery_lon is not None]
+  routes = {None: {"stops": [order for order in orders if order.delivery_lat is None or order.delivery_lon is None], "km": 0.0}}
+  if not located:
+      return routes
+
+  lats = np.array([order.delivery_lat for order in located])
+  lons = np.array([order.delivery_lon for order in located])
+  engine = get_zone_engine()
+  zones = np.array([
+      order.delivery_zone or name or UNZONED
+      for order, name in zip(located, engine.names_for(engine.classify_many(lats, lons)))
+  ])
+
+  # Split the time budget across zones by stop count
+  for zone in np.unique(zones):
+      members = np.nonzero(zones == zone)[0]
+      budget = time_limit * len(members) / len(located)
+      order_in_zone, km = solve_route(lats[members], lons[members], depot, budget)
+      routes[str(zone)] = {"stops": [located[members[k]] for k in order_in_zone], "km": km}
+      logger.info("Route %s: %d stops, %.1f km", zone, len(members), km)
+  return routes
@@ -0,0 +1,176 @@
+import logging
+import threading
+from datetime import datetime
+
+import streamlit as st
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
+
+from modules.database import _secret
+from modules.models import Base
+
+logger = logging.getLogger(__name__)
+
+# Kept outside Base.metadata so model create_all never touches it
+_version_metadata = MetaData()
+schema_version = Table(
+  "schema_version", _version_metadata,
+  Column("version", Integer, primary_key=True),
+  Column("description", String, nullable=False),
+  Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+def _create_base_tables(conn):
+  Base.metadata.create_all(conn)
+
+def _create_indexes(*names):
+  def migrate(conn):
+      indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+      for name in names:
+          # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes
+          conn.execute(CreateIndex(indexes[name], if_not_exists=True))
+  return migrate
+
+def _create_tables(*names):
+  def migrate(conn):
+      Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in names])
+  return migrate
+
+def _add_columns(table_name, *column_names):
+  def migrate(conn):
+      table = Base.metadata.tables[table_name]
+      existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+      for name in column_names:
+          if name in existing:
+              continue
+          column_type = table.c[name].type.compile(dialect=conn.dialect)
+          conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+  return migrate
+
+def _rebuild_rollups(conn):
+  from modules.rollups import rebuild_rollups
+  # Runs before the orders location columns exist on upgraded databases
+  rebuild_rollups(conn, by_zone=False)
+
+def _recreate_rollups(conn):
+  from modules.rollups import rebuild_rollups, rollup_table
+  # The primary key gains product_id, so the table is rebuilt rather than altered
+  rollup_table.drop(conn, checkfirst=True)
+  rollup_table.create(conn)
+  rebuild_rollups(conn)
+
+def _rebuild_slots(conn):
+  from modules.slots import rebuild_slots
+  rebuild_slots(conn)
+
+def _reconcile_counters(conn):
+  from modules.counters import correct_drift, counter_drift
+  correct_drift(conn, counter_drift(conn))
+
+def _create_search_indexes(conn):
+  from modules.search import create_search_indexes
+  create_search_indexes(conn)
+
+def _rebuild_search_indexes(conn):
+  from modules.search import rebuild_search_indexes
+  rebuild_search_indexes(conn)
+
+# Ordered (description, callable) pairs; the schema version is the list length.
+# Append new steps, never edit or reorder applied ones.
+MIGRATIONS = [
+  ("create base tables", _create_base_tables),
+  ("order and subscription query indexes", _create_indexes(
+      "ix_orders_user_id_created_at",
+      "ix_orders_created_at",
+      "ix_orders_status_updated_at",
+      "ix_subscriptions_user_id",
+  )),
+  ("keyset pagination indexes", _create_indexes(
+      "ix_users_created_at_id",
+      "ix_subscriptions_start_date_id",
+  )),
+  ("daily order rollups", _create_tables("order_daily_rollups")),
+  ("backfill daily order rollups", _rebuild_rollups),
+  ("order location columns", _add_columns("orders", "colonia", "delivery_zone", "delivery_lat", "delivery_lon")),
+  ("user colonia column", _add_columns("users", "colonia")),
+  ("colonia and zone indexes", _create_indexes(
+      "ix_orders_colonia",
+      "ix_orders_delivery_zone_created_at",
+      "ix_users_colonia",
+  )),
+  ("delivery slot counters", _create_tables("delivery_slots")),
+  ("backfill delivery slot counters", _rebuild_slots),
+  ("background job leases", _create_tables("job_leases")),
+  ("order subscription cycle columns", _add_columns("orders", "subscription_id", "cycle")),
+  ("order subscription cycle index", _create_indexes("ix_orders_subscription_id_cycle")),
+  ("order plan and product indexes", _create_indexes(
+      "ix_orders_plan_name_created_at",
+      "ix_orders_product_id_created_at",
+  )),
+  ("KPI counters", _create_tables("kpi_counters")),
+  ("backfill KPI counters", _reconcile_counters),
+  ("admin search indexes", _create_search_indexes),
+  ("picker prefix indexes", _create_indexes(
+      "ix_users_email_lower",
+      "ix_users_name_lower",
+      "ix_products_name_lower",
+  )),
+  ("daily order rollups by product", _recreate_rollups),
+  ("search tables keyed by primary key", _rebuild_search_indexes),
+  ("order delivery date index", _create_indexes("ix_orders_delivery_date")),
+  ("search tables keyed through a rowid map", _rebuild_search_indexes),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_checked_lock = threading.Lock()
+_checked_engines = set()
+
+def current_version(conn):
+  """Highest applied migration, or 0 when the database was never bootstrapped."""
+  try:
+      return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+  except SQLAlchemyError:
+      conn.rollback()
+      return 0
+
+def bootstrap_schema(engine):
+  """Apply every pending migration; returns the list of versions applied."""
+  applied = []
+  with engine.begin() as conn:
+      _version_metadata.create_all(conn)
+      version = current_version(conn)
+      for number, (description, migrate) in enumerate(MIGRATIONS, start=1):
+          if number <= version:
+              continue
+          logger.info("Applying schema migration %d: %s", number, description)
+          migrate(conn)
+          conn.execute(schema_version.insert().values(
+              version=number, description=description, applied_at=datetime.utcnow()
+          ))
+          applied.append(number)
+  return applied
+
+def ensure_schema(engine):
+  """Check once per process that the database is at SCHEMA_VERSION.
+
+  Runs the migrations itself only when `[database] auto_migrate` is set;
+  otherwise an outdated database stops the page with a pointer to the CLI.
+  """
+  key = str(engine.url)
+  if key in _checked_engines:
+      return
+  with _checked_lock:
+      if key in _checked_engines:
+          return
+      with engine.connect() as conn:
+          version = current_version(conn)
+      if version < SCHEMA_VERSION:
+          if _secret("database", "auto_migrate", False):
+              bootstrap_schema(engine)
+          else:
+              logger.error("Database schema at version %d, expected %d.", version, SCHEMA_VERSION)
+              st.error("La base de datos no está actualizada. Ejecute `python manage.py bootstrap-schema`.")
+              st.stop()
+      _checked_engines.add(key)
@@ -0,0 +1,154 @@
+import logging
+import sqlite3
+
+from sqlalchemy import column, func, literal_column, or_, table, text
+
+from modules.models import Order, User
+
+logger = logging.getLogger(__name__)
+
+SEARCH_LIMIT = 20
+# Trigram indexes need at least this many characters to narrow anything down
+MIN_TERM_LENGTH = 3
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+
+# Searchable text columns per model
+SEARCH_COLUMNS = {
+  User: ("name", "email"),
+  Order: ("id", "phone_number", "delivery_address"),
+}
+
+def _fts_table(model):
+  return f"{model.__tablename__}_search"
+
+def _primary_key(model):
+  return model.__mapper__.primary_key[0]
+
+def _create_postgres_indexes(conn):
+  conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+  for model, columns in SEARCH_COLUMNS.items():
+      name = model.__tablename__
+      for column_name in columns:
+          conn.execute(text(
+              f"CREATE INDEX IF NOT EXISTS ix_{name}_{column_name}_trgm ON {name} USING gin ({column_name} gin_trgm_ops)"
+          ))
+
+def _keys_table(model):
+  return f"{_fts_table(model)}_keys"
+
+def _sqlite_has_trigram(dialect):
+  # The trigram tokenizer arrived in SQLite 3.34
+  return dialect.name == "sqlite" and (dialect.server_version_info or sqlite3.sqlite_version_info) >= TRIGRAM_SQLITE_VERSION
+
+def _create_sqlite_indexes(conn):
+  # FTS5 tables holding their own copy of the text, kept in step by triggers
+  # so Core and ORM writes are both indexed. The primary keys here are
+  # strings, whose rowids VACUUM may renumber, so each FTS row's rowid comes
+  # from a {fts}_keys row whose INTEGER PRIMARY KEY never moves; trigger
+  # deletes find the FTS row through that key instead of scanning.
+  for model, columns in SEARCH_COLUMNS.items():
+      name, fts, keys, key = model.__tablename__, _fts_table(model), _keys_table(model), _primary_key(model).name
+      listed = ", ".join(columns)
+      new = ", ".join(f"new.{column_name}" for column_name in columns)
+      watched = ", ".join(dict.fromkeys((key, *columns)))
+      insert_row = (
+          f"INSERT INTO {keys}(pk) VALUES (new.{key}); "
+          f"INSERT INTO {fts}(rowid, {listed}) VALUES ((SELECT id FROM {keys} WHERE pk = new.{key}), {new}); "
+      )
+      delete_row = (
+          f"DELETE FROM {fts} WHERE rowid = (SELECT id FROM {keys} WHERE pk = old.{key}); "
+          f"DELETE FROM {keys} WHERE pk = old.{key}; "
+      )
+      conn.execute(text(f"CREATE TABLE IF NOT EXISTS {keys} (id INTEGER PRIMARY KEY, pk NOT NULL UNIQUE)"))
+      conn.execute(text(
+          f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({listed}, tokenize='trigram')"
+      ))
+      conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {name} BEGIN {insert_row}END"))
+      conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {name} BEGIN {delete_row}END"))
+      conn.execute(text(
+          f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {watched} ON {name} BEGIN {delete_row}{insert_row}END"
+      ))
+      conn.execute(text(f"DELETE FROM {fts}"))
+      conn.execute(text(f"DELETE FROM {keys}"))
+      conn.execute(text(f"INSERT INTO {keys}(pk) SELECT {key} FROM {name}"))
+      conn.execute(text(
+          f"INSERT INTO {fts}(rowid, {listed}) SELECT {keys}.id, {', '.join(f'{name}.{column_name}' for column_name in columns)} "
+          f"FROM {name} JOIN {keys} ON {keys}.pk = {name}.{key}"
+      ))
+
+def _drop_sqlite_indexes(conn):
+  for model in SEARCH_COLUMNS:
+      fts = _fts_table(model)
+      for trigger in ("insert", "delete", "update"):
+          conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{trigger}"))
+      conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+      conn.execute(text(f"DROP TABLE IF EXISTS {_keys_table(model)}"))
+
+def create_search_indexes(conn):
+  """pg_trgm GIN indexes on Postgres, trigram FTS5 tables on SQLite 3.34+."""
+  dialect = conn.dialect
+  if dialect.name == "postgresql":
+      _create_postgres_indexes(conn)
+  elif _sqlite_has_trigram(dialect):
+      _create_sqlite_indexes(conn)
+  else:
+      logger.warning("No search indexes for %s %s; admin search will scan",
+                     dialect.name, ".".join(map(str, dialect.server_version_info or ())))
+
+def rebuild_search_indexes(conn):
+  """Recreate the SQLite FTS5 tables and triggers from scratch; other dialects only ensure theirs exist."""
+  if _sqlite_has_trigram(conn.dialect):
+      _drop_sqlite_indexes(conn)
+  create_search_indexes(conn)
+
+def _like_pattern(term, prefix_only=False):
+  escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+  return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+def _columns(model):
+  return [getattr(model, name) for name in SEARCH_COLUMNS[model]]
+
+def _search_postgres(query, model, term):
+  columns = _columns(model)
+  # ILIKE '%term%' is answered by the trigram indexes; word_similarity ranks
+  # closer matches first
+  score = func.greatest(*[func.word_similarity(term, func.coalesce(column, "")) for column in columns])
+  return query.filter(
+      or_(*[column.ilike(_like_pattern(term), escape="\\") for column in columns])
+  ).order_by(score.desc())
+
+def _search_sqlite(query, model, term):
+  fts = _fts_table(model)
+  fts_table = table(fts, column("rowid"), column("rank"))
+  keys = table(_keys_table(model), column("id"), column("pk"))
+  phrase = '"' + term.replace('"', '""') + '"'
+  # bm25 rank is computed by FTS5 for the matching rows only
+  return query.join(keys, keys.c.pk == _primary_key(model)).join(fts_table, fts_table.c.rowid == keys.c.id).filter(
+      literal_column(fts).op("MATCH")(phrase)
+  ).order_by(fts_table.c.rank)
+
+def _search_prefix(query, model, term):
+  pattern = _like_pattern(term, prefix_only=True)
+  return query.filter(or_(*[column.ilike(pattern, escape="\\") for column in _columns(model)]))
+
+def search(session, model, term, limit=SEARCH_LIMIT, query=None):
+  """Best `limit` rows of `model` whose search columns contain `term`, best first.
+
+  `query` may carry extra filters or loader options; matches are ranked
+  among the rows that pass its filters. Terms shorter than
+  MIN_TERM_LENGTH only match as a prefix.
+  """
+  term = term.strip()
+  query = query if query is not None else session.query(model)
+  if not term:
+      return []
+  dialect = session.get_bind().dialect
+  if len(term) < MIN_TERM_LENGTH:
+      query = _search_prefix(query, model, term)
+  elif dialect.name == "postgresql":
+      query = _search_postgres(query, model, term)
+  elif _sqlite_has_trigram(dialect):
+      query = _search_sqlite(query, model, term)
+  else:
+      query = query.filter(or_(*[column.ilike(_like_pattern(term), escape="\\") for column in _columns(model)]))
+  return query.limit(limit).all()
@@ -0,0 +1,164 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from modules.database import _secret, upsert_increment
+from modules.models import DeliverySlot, Order, OrderStatus, keep_previous_values
+
+logger = logging.getLogger(__name__)
+
+slot_table = DeliverySlot.__table__
+
+DELIVERY_SLOTS = ("AM (7am - 12pm)",)
+DEFAULT_SLOT_CAPACITY = 30
+# No deliveries on Sunday
+DELIVERY_WEEKDAYS = (0, 1, 2, 3, 4, 5)
+
+class SlotUnavailable(Exception):
+  """The requested day/zone/slot has no capacity left."""
+
+  def __init__(self, day, zone, slot):
+      super().__init__(f"No capacity left for {slot} on {day} in {zone or 'unzoned'}")
+      self.day = day
+      self.zone = zone
+      self.slot = slot
+
+def slot_capacity(zone, slot):
+  """Boxes per day for a zone and slot.
+
+  `[delivery] slot_capacity` (or DELIVERY_SLOT_CAPACITY) is the default and
+  `[delivery.zone_capacity]` overrides it per zone name.
+  """
+  per_zone = _secret("delivery", "zone_capacity", {}) or {}
+  if zone in per_zone:
+      return int(per_zone[zone])
+  return int(_secret("delivery", "slot_capacity") or os.getenv("DELIVERY_SLOT_CAPACITY") or DEFAULT_SLOT_CAPACITY)
+
+def _day(value):
+  return value.date() if isinstance(value, datetime) else value
+
+def _key(values):
+  if values["status"] == OrderStatus.cancelled or not values["delivery_date"] or not values["delivery_time"]:
+      return None
+  return (_day(values["delivery_date"]), values["delivery_zone"] or "", values["delivery_time"])
+
+TRACKED_ATTRIBUTES = ("delivery_date", "delivery_zone", "delivery_time", "status")
+keep_previous_values(*[getattr(Order, name) for name in TRACKED_ATTRIBUTES])
+
+def _values(order, previous=False):
+  values = {}
+  state = inspect(order)
+  for name in TRACKED_ATTRIBUTES:
+      history = state.attrs[name].history
+      if previous and history.deleted:
+          values[name] = history.deleted[0]
+      elif previous and history.unchanged:
+          values[name] = history.unchanged[0]
+      else:
+          values[name] = getattr(order, name)
+  return values
+
+def reserve(conn, day, zone, slot, count=1):
+  """Book `count` boxes if the slot has room; raises SlotUnavailable otherwise.
+
+  The capacity check and the increment are one conditional UPDATE, so two
+  checkouts racing for the last box cannot both win.
+  """
+  keys = {"day": day, "zone": zone, "slot": slot}
+  # Make sure the counter row exists without touching its value
+  upsert_increment(conn, slot_table, keys, {"reserved": 0})
+  result = conn.execute(
+      update(slot_table)
+      .where(
+          slot_table.c.day == day, slot_table.c.zone == zone, slot_table.c.slot == slot,
+          slot_table.c.reserved + count <= slot_capacity(zone, slot),
+      )
+      .values(reserved=slot_table.c.reserved + count)
+  )
+  if result.rowcount != 1:
+      raise SlotUnavailable(day, zone, slot)
+
+def release(conn, day, zone, slot, count=1):
+  conn.execute(
+      update(slot_table)
+      .where(slot_table.c.day == day, slot_table.c.zone == zone, slot_table.c.slot == slot)
+      .values(reserved=slot_table.c.reserved - count)
+  )
+
+@event.listens_for(Session, "after_flush")
+def _maintain_slots(session, flush_context):
+  # New orders must fit; edits to existing orders (admin moves, cancellations)
+  # adjust the counters without a capacity check
+  booked = defaultdict(int)
+  moved = defaultdict(int)
+  for obj in session.new:
+      if isinstance(obj, Order):
+          key = _key(_values(obj))
+          if key:
+              booked[key] += 1
+  for obj in session.dirty:
+      if isinstance(obj, Order):
+          before, after = _key(_values(obj, previous=True)), _key(_values(obj))
+          if before != after:
+              if before:
+                  moved[before] -= 1
+              if after:
+                  moved[after] += 1
+  for obj in session.deleted:
+      if isinstance(obj, Order):
+          key = _key(_values(obj, previous=True))
+          if key:
+              moved[key] -= 1
+  if not (booked or moved):
+      return
+  conn = session.connection()
+  for (day, zone, slot), count in booked.items():
+      reserve(conn, day, zone, slot, count)
+  for (day, zone, slot), count in moved.items():
+      if count > 0:
+          upsert_increment(conn, slot_table, {"day": day, "zone": zone, "slot": slot}, {"reserved": count})
+      elif count < 0:
+          release(conn, day, zone, slot, -count)
+
+def available_slots(session, zone, start=None, days=14):
+  """[(day, slot, remaining)] for the next `days` delivery days in `zone`.
+
+  One primary-key range read of the counters; orders are never counted here.
+  """
+  start = start or date.today()
+  end = start + timedelta(days=days)
+  zone = zone or ""
+  reserved = dict(
+      ((row.day, row.slot), row.reserved)
+      for row in session.execute(
+          select(slot_table.c.day, slot_table.c.slot, slot_table.c.reserved)
+          .where(slot_table.c.day.between(start, end), slot_table.c.zone == zone)
+      )
+  )
+  options = []
+  for offset in range(days + 1):
+      day = start + timedelta(days=offset)
+      if day.weekday() not in DELIVERY_WEEKDAYS:
+          continue
+      for slot in DELIVERY_SLOTS:
+          options.append((day, slot, slot_capacity(zone, slot) - reserved.get((day, slot), 0)))
+  return options
+
+def rebuild_slots(conn):
+  """Recount every reservation from the orders table; returns rows written."""
+  orders = Order.__table__
+  day = func.date(orders.c.delivery_date)
+  zone = func.coalesce(orders.c.delivery_zone, "")
+  grouped = select(day, zone, orders.c.delivery_time, func.count(orders.c.id)).where(and_(
+      orders.c.delivery_date.isnot(None),
+      orders.c.delivery_time.isnot(None),
+      orders.c.status != OrderStatus.cancelled,
+  )).group_by(day, zone, orders.c.delivery_time)
+  conn.execute(delete(slot_table))
+  result = conn.execute(insert(slot_table).from_select(["day", "zone", "slot", "reserved"], grouped))
+  logger.info("Rebuilt delivery slot counters: %s rows", result.rowcount)
+  return result.rowcount
@@ -0,0 +1,76 @@
+import logging
+import time
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from modules.cache import table_versions
+from modules.database import get_engine
+from modules.models import Order, OrderStatus
+from modules.rollups import apply_deltas
+
+logger = logging.getLogger(__name__)
+
+Transition = namedtuple("Transition", ["source", "target", "timestamp", "age"])
+
+# Time rules for the automatic sweep; `timestamp` is the column the age is
+# measured from (pending orders have never been updated)
+STATUS_TRANSITIONS = (
+  Transition(OrderStatus.pending, OrderStatus.confirmed, "created_at", timedelta(hours=1)),
+  Transition(OrderStatus.confirmed, OrderStatus.shipped, "updated_at", timedelta(days=1)),
+  Transition(OrderStatus.shipped, OrderStatus.delivered, "updated_at", timedelta(days=3)),
+)
+
+def advance_order_statuses(conn, now=None, transitions=STATUS_TRANSITIONS):
+  """Apply every time-based transition as one UPDATE each, inside `conn`'s transaction.
+
+  Later stages run first so an order moves at most one step per sweep.
+  Rollups are adjusted with one GROUP BY per transition over the rows
+  stamped with this sweep's `now`, since the ORM listener does not see
+  Core updates. Returns {(source, target): rows}.
+  """
+  now = now or datetime.utcnow()
+  orders = Order.__table__
+  day = func.date(orders.c.created_at)
+  plan_name = func.coalesce(orders.c.plan_name, "")
+  zone = func.coalesce(orders.c.delivery_zone, "")
+  product_id = func.coalesce(orders.c.product_id, 0)
+  counts = {}
+  deltas = defaultdict(lambda: [0, 0.0])
+  for transition in reversed(transitions):
+      result = conn.execute(
+          update(orders)
+          .where(orders.c.status == transition.source, orders.c[transition.timestamp] < now - transition.age)
+          .values(status=transition.target, updated_at=now)
+      )
+      counts[(transition.source, transition.target)] = result.rowcount
+      if not result.rowcount:
+          continue
+      moved = conn.execute(
+          select(day, plan_name, zone, product_id, func.count(), func.coalesce(func.sum(orders.c.total_price), 0.0))
+          .where(orders.c.status == transition.target, orders.c.updated_at == now, orders.c.created_at.isnot(None))
+          .group_by(day, plan_name, zone, product_id)
+      ).all()
+      for moved_day, moved_plan, moved_zone, moved_product, count, revenue in moved:
+          if isinstance(moved_day, str):
+              moved_day = date.fromisoformat(moved_day)
+          for status, sign in ((transition.source, -1), (transition.target, 1)):
+              delta = deltas[(moved_day, status, moved_plan, moved_zone, moved_product)]
+              delta[0] += sign * count
+              delta[1] += sign * revenue
+  apply_deltas(conn, dict(deltas))
+  return {(transition.source, transition.target): counts[(transition.source, transition.target)] for transition in transitions}
+
+def sweep_order_statuses(engine=None, now=None):
+  """Run advance_order_statuses in its own transaction and invalidate cached reads."""
+  start = time.perf_counter()
+  with (engine or get_engine()).begin() as conn:
+      counts = advance_order_statuses(conn, now)
+  if any(counts.values()):
+      table_versions.bump(Order.__tablename__, "order_daily_rollups")
+  logger.info(
+      "Order status sweep in %.1f ms: %s", (time.perf_counter() - start) * 1000,
+      ", ".join(f"{source.value}->{target.value}: {count}" for (source, target), count in counts.items()),
+  )
+  return counts
@@ -1,6 +1,7 @@
 import streamlit as st
 from sqlalchemy.orm import Session
 from modules.models import User, Product, Order, Subscription, PaymentTransaction, OrderStatus, setup_database
+from modules.queries import order_query
 
 def display_order_progress(status):
   stages = ['Pendiente', 'Preparando', 'En camino', 'Entregado']
@@ -42,7 +43,7 @@ def display_user_orders():
     try:
         # Filter orders for the current user
         current_user_id = st.session_state.user.id
-        orders = session.query(Order).filter(Order.user_id == current_user_id).order_by(Order.created_at.desc()).all()
+        orders = order_query(session, "customer_orders").filter(Order.user_id == current_user_id).order_by(Order.created_at.desc()).all()
         
         if not orders:
             st.info("No tienes órdenes activas en este momento.")
@@ -60,10 +61,8 @@ def display_user_orders():
                     if order.additional_notes:
                         st.write(f"**Referencias adicionales:** {order.additional_notes}")
                         
-                    if order.product_id:
-                        product = session.query(Product).filter_by(id=order.product_id).first()
-                        if product:
-                            st.write(f"**Producto:** {product.name}")
+                    if order.product:
+                        st.write(f"**Producto:** {order.product.name}")
                     
                     display_order_progress(order.status)
                     
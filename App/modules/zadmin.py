@@ -1,11 +1,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 from modules.models import SessionLocal, User, Product, Order, Subscription, UserType, OrderStatus
-import base64
+from modules.database import get_engine, pool_stats
+from modules.queries import order_query, subscription_query
+from modules.pagination import paginated_listing
+from modules.search import SEARCH_LIMIT, search
+from modules.pickers import entity_picker
+from modules.cache import dashboard_cache
+from modules.routes import plan_routes
+from modules.jobs import job_status
+from modules.exports import export_orders, take_export
+from modules.analytics import colonia_facts, order_trends, summarize
+from modules.counters import read_counters
+import os
 
 
 @contextmanager
@@ -18,7 +29,7 @@ def get_db():
 
 # Sidebar for navigation
 st.sidebar.title("Administración")
-page = st.sidebar.selectbox("Ir a", ["Resumen", "Usuarios", "Productos", "Órdenes", "Suscripciones", "Analítica"])
+page = st.sidebar.selectbox("Ir a", ["Resumen", "Usuarios", "Productos", "Órdenes", "Suscripciones", "Analítica", "Rutas"])
 
 def overview_page():
     with get_db() as session:
@@ -26,30 +37,26 @@ def overview_page():
 
         # Create columns for displaying metrics
         col1, col2, col3, col4 = st.columns(4)
+        counters = read_counters(session)
 
         with col1:
-            total_users = session.query(func.count(User.id)).scalar()
-            st.metric("Usuarios Totales", total_users)
+            st.metric("Usuarios Totales", int(counters["users"]))
 
         with col2:
-            total_products = session.query(func.count(Product.id)).scalar()
-            st.metric("Productos Totales", total_products)
+            st.metric("Productos Totales", int(counters["products"]))
 
         with col3:
-            total_orders = session.query(func.count(Order.id)).scalar()
-            st.metric("Órdenes Totales", total_orders)
+            st.metric("Órdenes Totales", int(counters["orders"]))
 
         with col4:
-            total_revenue = session.query(func.sum(Order.total_price)).scalar()
-            total_revenue = total_revenue if total_revenue is not None else 0.0
-            st.metric("Ingresos Totales", f"L.{total_revenue:.2f}")
+            st.metric("Ingresos Totales", f"L.{counters['revenue']:.2f}")
 
         # Orders by status
         st.subheader("Órdenes por Estado")
-        status_counts = session.query(
+        status_counts = dashboard_cache.get_or_load(("status_counts",), ("orders",), lambda: [tuple(row) for row in session.query(
             Order.status,
             func.count(Order.id).label('Cantidad')
-        ).group_by(Order.status).all()
+        ).group_by(Order.status).all()])
         status_df = pd.DataFrame(status_counts, columns=['Estado', 'Cantidad'])
         status_df['Estado'] = status_df['Estado'].apply(lambda x: x.value.capitalize())
         fig = px.bar(status_df, x='Estado', y='Cantidad', title='Órdenes por Estado')
@@ -57,7 +64,7 @@ def overview_page():
 
         # Recent Orders
         st.subheader("Órdenes Recientes")
-        recent_orders = session.query(Order).order_by(Order.created_at.desc()).limit(5).all()
+        recent_orders = order_query(session, "recent_orders").order_by(Order.created_at.desc()).limit(5).all()
         if recent_orders:
             order_data = [{
                 "ID": order.id,
@@ -70,6 +77,27 @@ def overview_page():
         else:
             st.info("No se encontraron órdenes recientes.")
 
+        with st.expander("Pool de Conexiones y Caché"):
+            st.json({"pool": pool_stats(), "cache": dashboard_cache.stats()})
+
+        with st.expander("Tareas Programadas"):
+            jobs = job_status(session)
+            if jobs:
+                st.dataframe(pd.DataFrame([{
+                    "Tarea": job.name,
+                    "Estado": job.last_status or "pendiente",
+                    "Ejecutando en": job.owner or "-",
+                    "Última ejecución": job.last_started_at,
+                    "Próxima ejecución": job.next_run_at,
+                    "Duración (ms)": job.last_duration_ms,
+                    "Promedio (ms)": job.total_duration_ms / job.run_count if job.run_count else None,
+                    "Ejecuciones": job.run_count,
+                    "Fallos": job.failure_count,
+                    "Último error": job.last_error or "",
+                } for job in jobs]), use_container_width=True)
+            else:
+                st.info("Ninguna tarea se ha ejecutado. Inicie el proceso con `python worker.py`.")
+
 def users_page():
     with get_db() as session:
         st.title("Gestión de Usuarios")
@@ -81,9 +109,6 @@ def users_page():
 
         # Build query with filters
         query = session.query(User)
-        if search_term:
-            query = query.filter(or_(User.name.ilike(f"%{search_term}%"), User.email.ilike(f"%{search_term}%")))
-            st.write(f"Filtrando por Nombre o Email: {search_term}")
         if user_type_filter != "Todos":
             query = query.filter(User.type == UserType(user_type_filter))
             st.write(f"Filtrando por Tipo de Usuario: {user_type_filter}")
@@ -92,7 +117,15 @@ def users_page():
             query = query.filter(User.is_active == is_active)
             st.write(f"Filtrando por Estado de Actividad: {'Activo' if is_active else 'Inactivo'}")
 
-        users = query.all()
+        if search_term.strip():
+            # Ranked search replaces the pager: only the best matches are shown
+            users = search(session, User, search_term, query=query)
+            st.caption(f"{len(users)} mejores resultados para: {search_term} (máximo {SEARCH_LIMIT})")
+        else:
+            users = paginated_listing(
+                "admin_users", query, [User.created_at, User.id],
+                filters=(user_type_filter, is_active_filter), label="usuarios"
+            )
         user_data = [{
             "ID": user.id,
             "Nombre": user.name,
@@ -104,30 +137,25 @@ def users_page():
         st.dataframe(pd.DataFrame(user_data))
 
         st.subheader("Editar Usuario")
-        if users:
-            selected_user_email = st.selectbox("Seleccionar Usuario para Editar", [user.email for user in users])
-            selected_user = session.query(User).filter_by(email=selected_user_email).first()
-
-            if selected_user:
-                with st.form("edit_user_form"):
-                    new_name = st.text_input("Nombre", value=selected_user.name)
-                    new_email = st.text_input("Email", value=selected_user.email)
-                    new_user_type = st.selectbox("Tipo de Usuario", [type.value for type in UserType], index=[type.value for type in UserType].index(selected_user.type.value))
-                    new_address = st.text_input("Dirección", value=selected_user.address or "")
-                    new_phone_number = st.text_input("Número de Teléfono", value=selected_user.phone_number or "")
-                    new_is_active = st.checkbox("Activo", value=selected_user.is_active)
-
-                    if st.form_submit_button("Actualizar Usuario"):
-                        selected_user.name = new_name
-                        selected_user.email = new_email
-                        selected_user.type = UserType(new_user_type)
-                        selected_user.address = new_address
-                        selected_user.phone_number = new_phone_number
-                        selected_user.is_active = new_is_active
-                        session.commit()
-                        st.success("Usuario actualizado exitosamente.")
-        else:
-            st.info("No hay usuarios para editar.")
+        selected_user = entity_picker(session, User, "Buscar usuario por email o nombre", "edit_user")
+        if selected_user:
+            with st.form("edit_user_form"):
+                new_name = st.text_input("Nombre", value=selected_user.name)
+                new_email = st.text_input("Email", value=selected_user.email)
+                new_user_type = st.selectbox("Tipo de Usuario", [type.value for type in UserType], index=[type.value for type in UserType].index(selected_user.type.value))
+                new_address = st.text_input("Dirección", value=selected_user.address or "")
+                new_phone_number = st.text_input("Número de Teléfono", value=selected_user.phone_number or "")
+                new_is_active = st.checkbox("Activo", value=selected_user.is_active)
+
+                if st.form_submit_button("Actualizar Usuario"):
+                    selected_user.name = new_name
+                    selected_user.email = new_email
+                    selected_user.type = UserType(new_user_type)
+                    selected_user.address = new_address
+                    selected_user.phone_number = new_phone_number
+                    selected_user.is_active = new_is_active
+                    session.commit()
+                    st.success("Usuario actualizado exitosamente.")
 
 def products_page():
     with get_db() as session:
@@ -149,8 +177,7 @@ def products_page():
             st.table(pd.DataFrame(product_data))
 
             st.subheader("Editar Producto")
-            selected_product_id = st.selectbox("Seleccionar Producto para Editar", [product.id for product in products])
-            selected_product = session.query(Product).filter_by(id=selected_product_id).first()
+            selected_product = entity_picker(session, Product, "Buscar producto por nombre o ID", "edit_product")
 
             if selected_product:
                 with st.form("edit_product_form"):
@@ -180,13 +207,52 @@ def update_order_status(order_id, new_status):
               st.error("Invalid status type. Must be an instance of OrderStatus.")
       return False
 
+def order_row(order):
+  return {
+      "ID": order.id,
+      "Usuario": order.user.name if order.user else "N/A",
+      "Correo": order.user.email if order.user else "N/A",
+      "Teléfono": order.phone_number if order.phone_number else "N/A",
+      "Producto/Plan": order.plan_name if order.plan_name else "N/A",
+      "Cantidad": order.quantity,
+      "Total": f"L{order.total_price:.2f}" if order.total_price else "N/A",
+      "Estado": order.status.value.capitalize() if order.status else "N/A",
+      "Fecha de Creación": order.created_at.strftime('%Y-%m-%d %H:%M') if order.created_at else "N/A",
+      "Fecha de Entrega": order.delivery_date.strftime('%Y-%m-%d') if order.delivery_date else "N/A",
+      "Horario de Entrega": order.delivery_time if order.delivery_time else "N/A",
+      "Dirección": order.delivery_address if order.delivery_address else "N/A",
+      "Referencias": order.additional_notes if order.additional_notes else "N/A"
+  }
+
 def orders_page():
   with get_db() as session:
       st.title("Gestión de Órdenes")
       
-      # Fetch all orders, ordering by creation date
-      orders = session.query(Order).order_by(Order.created_at.desc()).all()
-      st.write(f"Total de órdenes encontradas: {len(orders)}")
+      # Server-side filters; only the current page is loaded
+      search_term = st.text_input("Buscar por ID, teléfono o dirección")
+      col1, col2 = st.columns(2)
+      with col1:
+          status_filter = st.selectbox("Filtrar por estado", ["Todos"] + [status.value for status in OrderStatus])
+      with col2:
+          date_range = st.date_input("Rango de fechas de creación", value=())
+
+      query = order_query(session, "admin_orders")
+      if status_filter != "Todos":
+          query = query.filter(Order.status == OrderStatus(status_filter))
+      if len(date_range) == 2:
+          query = query.filter(Order.created_at.between(
+              datetime.combine(date_range[0], datetime.min.time()),
+              datetime.combine(date_range[1], datetime.max.time())
+          ))
+
+      if search_term.strip():
+          orders = search(session, Order, search_term, query=query)
+          st.caption(f"{len(orders)} mejores resultados para: {search_term} (máximo {SEARCH_LIMIT})")
+      else:
+          orders = paginated_listing(
+              "admin_orders", query, [Order.created_at, Order.id],
+              filters=(status_filter, tuple(date_range)), label="órdenes"
+          )
       
       if orders:
           for order in orders:
@@ -231,33 +297,40 @@ def orders_page():
                           st.info("El estado seleccionado es el mismo que el actual")
           
           # Display orders in a dataframe
-          order_data = [{
-              "ID": order.id,
-              "Usuario": order.user.name if order.user else "N/A",
-              "Correo": order.user.email if order.user else "N/A",
-              "Teléfono": order.phone_number if order.phone_number else "N/A",
-              "Producto/Plan": order.plan_name if order.plan_name else "N/A",
-              "Cantidad": order.quantity,
-              "Total": f"L{order.total_price:.2f}" if order.total_price else "N/A",
-              "Estado": order.status.value.capitalize() if order.status else "N/A",
-              "Fecha de Creación": order.created_at.strftime('%Y-%m-%d %H:%M') if order.created_at else "N/A",
-              "Fecha de Entrega": order.delivery_date.strftime('%Y-%m-%d') if order.delivery_date else "N/A",
-              "Horario de Entrega": order.delivery_time if order.delivery_time else "N/A",
-              "Dirección": order.delivery_address if order.delivery_address else "N/A",
-              "Referencias": order.additional_notes if order.additional_notes else "N/A"
-          } for order in orders]
+          order_data = [order_row(order) for order in orders]
           
           df = pd.DataFrame(order_data)
           
           # Allow sorting and filtering
           st.dataframe(df, use_container_width=True)
           
-          # Add export functionality
-          if st.button("Exportar a CSV"):
-              csv = df.to_csv(index=False)
-              b64 = base64.b64encode(csv.encode()).decode()
-              href = f'<a href="data:file/csv;base64,{b64}" download="ordenes.csv">Descargar CSV</a>'
-              st.markdown(href, unsafe_allow_html=True)
+          # Export every order matching the filters, streamed to a temp file
+          export_format = st.radio("Formato de exportación", ["CSV", "Parquet"], horizontal=True)
+          if st.button("Generar exportación"):
+              previous = st.session_state.pop("order_export", None)
+              if previous and os.path.exists(previous["path"]):
+                  os.remove(previous["path"])
+              with st.spinner("Exportando órdenes..."):
+                  path, rows = export_orders(
+                      get_engine(), export_format.lower(),
+                      status=OrderStatus(status_filter) if status_filter != "Todos" else None,
+                      start=datetime.combine(date_range[0], datetime.min.time()) if len(date_range) == 2 else None,
+                      end=datetime.combine(date_range[1], datetime.max.time()) if len(date_range) == 2 else None,
+                  )
+              st.session_state.order_export = {"path": path, "rows": rows, "format": export_format}
+
+          export = st.session_state.get("order_export")
+          if export and not os.path.exists(export["path"]):
+              # Already downloaded, or expired
+              st.session_state.pop("order_export", None)
+          elif export:
+              # The file is only read when the button is clicked, not on every rerun
+              st.download_button(
+                  f"Descargar {export['rows']} órdenes ({export['format']})",
+                  lambda path=export["path"]: take_export(path),
+                  file_name=f"ordenes.{export['format'].lower()}",
+                  mime="text/csv" if export["format"] == "CSV" else "application/vnd.apache.parquet",
+              )
       else:
           st.info("No se encontraron órdenes.")
 
@@ -266,7 +339,10 @@ def subscriptions_page():
       st.title("Gestión de Suscripciones")
 
       st.subheader("Lista de Suscripciones")
-      subscriptions = session.query(Subscription).join(User).all()
+      subscriptions = paginated_listing(
+          "admin_subscriptions", subscription_query(session, "admin_subscriptions"),
+          [Subscription.start_date, Subscription.id], label="suscripciones"
+      )
       subscription_data = [{
           "ID": sub.id,
           "Usuario": sub.user.name if sub.user else "N/A",
@@ -278,26 +354,24 @@ def subscriptions_page():
       st.dataframe(pd.DataFrame(subscription_data))
 
       st.subheader("Editar Suscripción")
-      if subscriptions:
-          selected_sub_id = st.selectbox("Seleccionar Suscripción para Editar", [sub.id for sub in subscriptions])
-          selected_sub = session.query(Subscription).filter_by(id=selected_sub_id).first()
-
-          if selected_sub:
-              with st.form("edit_subscription_form"):
-                  new_plan_name = st.text_input("Nombre del Plan", value=selected_sub.plan_name)
-                  new_start_date = st.date_input("Fecha de Inicio", value=selected_sub.start_date.date())
-                  new_end_date = st.date_input("Fecha de Fin", value=selected_sub.end_date.date() if selected_sub.end_date else datetime.now().date())
-                  new_is_active = st.checkbox("Activo", value=selected_sub.is_active)
-
-                  if st.form_submit_button("Actualizar Suscripción"):
-                      selected_sub.plan_name = new_plan_name
-                      selected_sub.start_date = datetime.combine(new_start_date, datetime.min.time())
-                      selected_sub.end_date = datetime.combine(new_end_date, datetime.min.time())
-                      selected_sub.is_active = new_is_active
-                      session.commit()
-                      st.success("Suscripción actualizada exitosamente.")
-      else:  # This else is correctly associated with the if subscriptions:
-          st.info("No hay suscripciones para editar.")
+      selected_sub = entity_picker(
+          session, Subscription, "Buscar suscripción por email o nombre del cliente, o por ID", "edit_subscription",
+          query=subscription_query(session, "admin_subscriptions"),
+      )
+      if selected_sub:
+          with st.form("edit_subscription_form"):
+              new_plan_name = st.text_input("Nombre del Plan", value=selected_sub.plan_name)
+              new_start_date = st.date_input("Fecha de Inicio", value=selected_sub.start_date.date())
+              new_end_date = st.date_input("Fecha de Fin", value=selected_sub.end_date.date() if selected_sub.end_date else datetime.now().date())
+              new_is_active = st.checkbox("Activo", value=selected_sub.is_active)
+
+              if st.form_submit_button("Actualizar Suscripción"):
+                  selected_sub.plan_name = new_plan_name
+                  selected_sub.start_date = datetime.combine(new_start_date, datetime.min.time())
+                  selected_sub.end_date = datetime.combine(new_end_date, datetime.min.time())
+                  selected_sub.is_active = new_is_active
+                  session.commit()
+                  st.success("Suscripción actualizada exitosamente.")
 
 def analytics_page():
     with get_db() as session:
@@ -315,14 +389,13 @@ def analytics_page():
             start_datetime = datetime.combine(start_date, datetime.min.time())
             end_datetime = datetime.combine(end_date, datetime.max.time())
 
-            # Ingresos a lo largo del tiempo
-            sales_data = session.query(
-                func.date(Order.created_at).label('Fecha'),
-                func.sum(Order.total_price).label('Ingresos Totales')
-            ).filter(Order.created_at.between(start_datetime, end_datetime)
-            ).group_by(func.date(Order.created_at)).all()
+            # Time, status and plan charts read the daily rollups; only the
+            # colonia charts group the orders themselves
+            trends = order_trends(session, start_date, end_date)
+            colonias = colonia_facts(session, start_datetime, end_datetime)
 
-            sales_df = pd.DataFrame(sales_data, columns=['Fecha', 'Ingresos Totales'])
+            # Ingresos a lo largo del tiempo
+            sales_df = summarize(trends, "day", "revenue").rename(columns={"day": "Fecha", "revenue": "Ingresos Totales"})
             st.subheader("Ingresos a lo Largo del Tiempo")
             fig = px.line(
                 sales_df,
@@ -335,14 +408,7 @@ def analytics_page():
 
             # Órdenes por Colonia
             st.subheader("Órdenes por Colonia")
-            colonia_data = session.query(
-                func.substr(Order.delivery_address, 1, func.instr(Order.delivery_address, ',') - 1).label('Colonia'),
-                func.count(Order.id).label('Cantidad')
-            ).filter(Order.created_at.between(start_datetime, end_datetime)
-            ).group_by(func.substr(Order.delivery_address, 1, func.instr(Order.delivery_address, ',') - 1)).all()
-
-            colonia_df = pd.DataFrame(colonia_data, columns=['Colonia', 'Cantidad'])
-            colonia_df = colonia_df[colonia_df['Colonia'].notna() & (colonia_df['Colonia'] != "")]
+            colonia_df = summarize(colonias, "colonia", drop_blank=True).rename(columns={"colonia": "Colonia", "orders": "Cantidad"})
             fig = px.bar(
                 colonia_df,
                 x='Colonia',
@@ -353,14 +419,7 @@ def analytics_page():
 
             # Órdenes por Estado
             st.subheader("Órdenes por Estado")
-            orders_by_status = session.query(
-                Order.status,
-                func.count(Order.id).label('Cantidad')
-            ).filter(Order.created_at.between(start_datetime, end_datetime)
-            ).group_by(Order.status).all()
-
-            status_df = pd.DataFrame(orders_by_status, columns=['Estado', 'Cantidad'])
-            status_df['Estado'] = status_df['Estado'].apply(lambda x: x.value.capitalize())
+            status_df = summarize(trends, "status").rename(columns={"status": "Estado", "orders": "Cantidad"})
             fig = px.pie(
                 status_df,
                 names='Estado',
@@ -371,13 +430,7 @@ def analytics_page():
 
             # Productos/Planes Más Vendidos
             st.subheader("Productos/Planes Más Vendidos")
-            top_products_data = session.query(
-                Order.plan_name.label('Producto'),
-                func.count(Order.id).label('Cantidad Vendida')
-            ).filter(Order.created_at.between(start_datetime, end_datetime)
-            ).group_by(Order.plan_name).order_by(func.count(Order.id).desc()).all()
-
-            top_products_df = pd.DataFrame(top_products_data, columns=['Producto', 'Cantidad Vendida'])
+            top_products_df = summarize(trends, "plan_name", drop_blank=True, sort=True).rename(columns={"plan_name": "Producto", "orders": "Cantidad Vendida"})
             fig = px.bar(
                 top_products_df,
                 x='Producto',
@@ -388,15 +441,9 @@ def analytics_page():
 
             # Demografía por Colonia
             st.subheader("Demografía de Clientes por Colonia")
-            demographics_data = session.query(
-                func.substr(User.address, 1, func.instr(User.address, ',') - 1).label('Colonia'),
-                func.count(User.id).label('Cantidad de Clientes')
-            ).join(Order, Order.user_id == User.id
-            ).filter(Order.created_at.between(start_datetime, end_datetime)
-            ).group_by(func.substr(User.address, 1, func.instr(User.address, ',') - 1)).all()
-
-            demographics_df = pd.DataFrame(demographics_data, columns=['Colonia', 'Cantidad de Clientes'])
-            demographics_df = demographics_df[demographics_df['Colonia'].notna() & (demographics_df['Colonia'] != "")]
+            demographics_df = summarize(colonias, "customer_colonia", drop_blank=True).rename(
+                columns={"customer_colonia": "Colonia", "orders": "Cantidad de Clientes"}
+            )
             fig = px.bar(
                 demographics_df,
                 x='Colonia',
@@ -407,6 +454,57 @@ def analytics_page():
         else:
             st.warning("Por favor, seleccione un rango de fechas válido.")
 
+def routes_page():
+  st.title("Rutas de Entrega")
+  delivery_date = st.date_input("Fecha de entrega", value=datetime.now().date() + timedelta(days=1))
+  time_limit = st.slider("Tiempo máximo de optimización (segundos)", 1, 30, 5)
+
+  if st.button("Planificar rutas"):
+      with get_db() as session:
+          routes = plan_routes(session, delivery_date, time_limit=time_limit)
+          # Plain rows so the plan survives reruns without the session
+          st.session_state["route_plan"] = {
+              "date": delivery_date,
+              "routes": {
+                  zone: {"km": route["km"], "rows": [
+                      {"Parada": stop, "Orden": order.id, "Cliente": order.user.name if order.user else "N/A",
+                       "Teléfono": order.phone_number or "N/A", "Colonia": order.colonia or "N/A",
+                       "Dirección": order.delivery_address or "N/A", "Horario": order.delivery_time or "N/A",
+                       "Latitud": order.delivery_lat, "Longitud": order.delivery_lon}
+                      for stop, order in enumerate(route["stops"], start=1)
+                  ]}
+                  for zone, route in routes.items()
+              },
+          }
+
+  plan = st.session_state.get("route_plan")
+  if not plan or plan["date"] != delivery_date:
+      return
+  routes = plan["routes"]
+  zones = [zone for zone in routes if zone is not None]
+  if not zones and not routes[None]["rows"]:
+      st.info("No hay órdenes para esta fecha.")
+      return
+
+  export_rows = []
+  for zone in zones:
+      route = routes[zone]
+      st.subheader(f"{zone}: {len(route['rows'])} paradas, {route['km']:.1f} km")
+      st.dataframe(pd.DataFrame(route["rows"]), use_container_width=True)
+      export_rows.extend({"Zona": zone, **row} for row in route["rows"])
+  if routes[None]["rows"]:
+      st.subheader("Sin coordenadas")
+      st.warning("Estas órdenes no tienen ubicación y deben asignarse manualmente.")
+      st.dataframe(pd.DataFrame(routes[None]["rows"]), use_container_width=True)
+      export_rows.extend({"Zona": "Sin coordenadas", **row} for row in routes[None]["rows"])
+
+  st.download_button(
+      "Descargar rutas (CSV)",
+      pd.DataFrame(export_rows).to_csv(index=False).encode("utf-8"),
+      file_name=f"rutas_{delivery_date.isoformat()}.csv",
+      mime="text/csv",
+  )
+
 # Routing de páginas
 if page == "Resumen":
     overview_page()
@@ -420,3 +518,5 @@ elif page == "Suscripciones":
     subscriptions_page()
 elif page == "Analítica":
     analytics_page()
+elif page == "Rutas":
+    routes_page()
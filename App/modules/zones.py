@@ -0,0 +1,188 @@
+import numpy as np
+
+# Coordinates for Tegucigalpa
+TEGUCIGALPA_COORDS = [14.0818, -87.2068]
+
+# Delivery zones as [lat, lon] polygons (adjusted to reduce overlap)
+DELIVERY_ZONES = {
+  "Zona 5": {
+      "coordinates": [
+          [14.1300, -87.2800],
+          [14.1300, -87.1450],
+          [14.0950, -87.1450],
+          [14.0950, -87.2800]
+      ],
+      "color": "#00FF00"  # Green
+  },
+  "Zona 3": {
+      "coordinates": [
+          [14.0950, -87.2200],
+          [14.0950, -87.1850],
+          [14.0600, -87.1850],
+          [14.0600, -87.2200]
+      ],
+      "color": "#FF0000"  # Red
+  },
+  "Zona 4": {
+      "coordinates": [
+          [14.0950, -87.1850],
+          [14.0950, -87.1400],
+          [14.0600, -87.1400],
+          [14.0600, -87.1850]
+      ],
+      "color": "#FFFF00"  # Yellow
+  },
+  "Zona 2": {
+      "coordinates": [
+          [14.0950, -87.2800],
+          [14.0950, -87.2200],
+          [14.0600, -87.2200],
+          [14.0600, -87.2800]
+      ],
+      "color": "#FF00FF"  # Magenta
+  },
+  "Zona 1": {
+      "coordinates": [
+          [14.0600, -87.2800],  # Extended left boundary
+          [14.0600, -87.1600],  # Extended right boundary
+          [14.0300, -87.1600],  # Bottom right
+          [14.0300, -87.2800]   # Bottom left
+      ],
+      "color": "#0000FF"  # Blue
+  },
+  "Zona 6": {
+      "coordinates": [
+          [14.1100, -87.1450],  # Santa Lucía
+          [14.1100, -87.0650],
+          [14.1400, -87.0650],
+          [14.1400, -87.1450]
+      ],
+      "color": "#FFA500"  # Orange
+  },
+  "Zona 7": {
+      "coordinates": [
+          [14.1350, -87.0650],  # Valle de Ángeles
+          [14.1350, -87.0299],
+          [14.1800, -87.0299],
+          [14.1800, -87.0650]
+      ],
+      "color": "#800080"  # Purple
+  }
+}
+
+class ZoneEngine:
+  """Point-in-zone classifier over the delivery polygons.
+
+  Polygons are bucketed into a uniform grid so each point is only tested
+  against the zones whose bounding box touches its cell. Where zones
+  overlap the smaller zone wins (ties go to declaration order), and points
+  outside every zone classify as out of coverage (None / -1).
+  """
+
+  def __init__(self, zones=DELIVERY_ZONES, grid_size=64):
+      self.names = list(zones)
+      self.polygons = [np.asarray(zone["coordinates"], dtype=float) for zone in zones.values()]
+      areas = [self._area(polygon) for polygon in self.polygons]
+      # Rank 0 is tested first: smallest area, then declaration order
+      order = sorted(range(len(self.names)), key=lambda i: (areas[i], i))
+
+      bboxes = np.array([[p[:, 0].min(), p[:, 0].max(), p[:, 1].min(), p[:, 1].max()] for p in self.polygons])
+      self.lat_min, self.lat_max = bboxes[:, 0].min(), bboxes[:, 1].max()
+      self.lon_min, self.lon_max = bboxes[:, 2].min(), bboxes[:, 3].max()
+      self.grid_size = grid_size
+      self.lat_step = (self.lat_max - self.lat_min) / grid_size
+      self.lon_step = (self.lon_max - self.lon_min) / grid_size
+
+      # cell_candidates[row * grid_size + col] = zone indices by rank, -1 padded
+      cells = [[] for _ in range(grid_size * grid_size)]
+      for zone in order:
+          lat0, lat1, lon0, lon1 = bboxes[zone]
+          rows = range(self._row(lat0), self._row(lat1) + 1)
+          cols = range(self._col(lon0), self._col(lon1) + 1)
+          for row in rows:
+              for col in cols:
+                  cells[row * grid_size + col].append(zone)
+      width = max(len(cell) for cell in cells)
+      self.cell_candidates = np.full((len(cells), width), -1, dtype=int)
+      for i, cell in enumerate(cells):
+          self.cell_candidates[i, :len(cell)] = cell
+
+  @staticmethod
+  def _area(polygon):
+      y, x = polygon[:, 0], polygon[:, 1]
+      return abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1))) / 2
+
+  def _row(self, lat):
+      return min(int((lat - self.lat_min) / self.lat_step), self.grid_size - 1)
+
+  def _col(self, lon):
+      return min(int((lon - self.lon_min) / self.lon_step), self.grid_size - 1)
+
+  @staticmethod
+  def _contains(polygon, lats, lons):
+      """Vectorized even-odd ray casting."""
+      inside = np.zeros(lats.shape, dtype=bool)
+      previous = polygon[-1]
+      with np.errstate(divide="ignore", invalid="ignore"):
+          for vertex in polygon:
+              (lat_i, lon_i), (lat_j, lon_j) = vertex, previous
+              crosses = (lat_i > lats) != (lat_j > lats)
+              crosses &= lons < (lon_j - lon_i) * (lats - lat_i) / (lat_j - lat_i) + lon_i
+              inside ^= crosses
+              previous = vertex
+      return inside
+
+  def classify_many(self, lats, lons):
+      """Zone index per point (-1 when out of coverage) for arrays of coordinates."""
+      lats = np.asarray(lats, dtype=float)
+      lons = np.asarray(lons, dtype=float)
+      result = np.full(lats.shape, -1, dtype=int)
+      in_bounds = (
+          (lats >= self.lat_min) & (lats <= self.lat_max)
+          & (lons >= self.lon_min) & (lons <= self.lon_max)
+      )
+      points = np.nonzero(in_bounds)[0]
+      if not len(points):
+          return result
+      rows = np.minimum(((lats[points] - self.lat_min) / self.lat_step).astype(int), self.grid_size - 1)
+      cols = np.minimum(((lons[points] - self.lon_min) / self.lon_step).astype(int), self.grid_size - 1)
+      candidates = self.cell_candidates[rows * self.grid_size + cols]
+
+      # Walk candidate slots in rank order; the first containing zone wins
+      for slot in range(candidates.shape[1]):
+          pending = result[points] == -1
+          slot_zones = candidates[:, slot]
+          for zone in np.unique(slot_zones[pending & (slot_zones >= 0)]):
+              mask = pending & (slot_zones == zone)
+              subset = points[mask]
+              hit = self._contains(self.polygons[zone], lats[subset], lons[subset])
+              result[subset[hit]] = zone
+      return result
+
+  def classify(self, lat, lon):
+      """Zone name for a single point, or None when out of coverage."""
+      if not (self.lat_min <= lat <= self.lat_max and self.lon_min <= lon <= self.lon_max):
+          return None
+      point_lat, point_lon = np.array([lat]), np.array([lon])
+      for zone in self.cell_candidates[self._row(lat) * self.grid_size + self._col(lon)]:
+          if zone < 0:
+              break
+          if self._contains(self.polygons[zone], point_lat, point_lon)[0]:
+              return self.names[zone]
+      return None
+
+  def names_for(self, indices):
+      """Map classify_many() output to zone names, None for out of coverage."""
+      return [self.names[i] if i >= 0 else None for i in indices]
+
+_engine = None
+
+def get_zone_engine():
+  global _engine
+  if _engine is None:
+      _engine = ZoneEngine()
+  return _engine
+
+def zone_for_point(lat, lon):
+  """Name of the delivery zone containing the point, else None."""
+  return get_zone_engine().classify(lat, lon)
@@ -30,12 +30,12 @@ else:
     # Your existing admin dashboard code goes here
     from modules.zadmin import (
         overview_page, users_page, products_page, orders_page,
-        subscriptions_page, analytics_page
+        subscriptions_page, analytics_page, routes_page
     )
 
     # Sidebar for navigation
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ["Overview", "Users", "Products", "Orders", "Subscriptions", "Analytics"], key="sidebar_radio")
+    page = st.sidebar.radio("Go to", ["Overview", "Users", "Products", "Orders", "Subscriptions", "Analytics", "Routes"], key="sidebar_radio")
 
     # Main app logic for the selected page
     if page == "Overview":
@@ -50,6 +50,8 @@ else:
         subscriptions_page()
     elif page == "Analytics":
         analytics_page()
+    elif page == "Routes":
+        routes_page()
 
     # Logout button
     if st.sidebar.button("Logout"):
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Tests import the app's modules the way the app does, from App/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.models import Base  # noqa: E402
+
+@pytest.fixture
+def engine(tmp_path):
+  engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+  Base.metadata.create_all(engine)
+  yield engine
+  engine.dispose()
+
+@pytest.fixture
+def session(engine):
+  with sessionmaker(bind=engine)() as session:
+      yield session
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from modules.addresses import backfill_locations
+from modules.geocoding import Gazetteer, query_key
+from modules.models import Order, User, UserType
+from modules.zones import zone_for_point
+
+def _gazetteer_coordinates():
+  gazetteer = Gazetteer()
+  def coordinates(colonia):
+      result = gazetteer.exact(query_key(colonia))
+      return (result.lat, result.lon) if result else None
+  return coordinates
+
+def test_backfill_classifies_legacy_orders_from_their_colonia(session, engine):
+  session.add_all([
+      User(id="user-1", name="Ana", email="ana@example.com", type=UserType.customer),
+      User(id="user-2", name="Luis", email="luis@example.com", type=UserType.customer),
+  ])
+  # Legacy rows: an address, no colonia, coordinates or zone
+  session.add_all([
+      Order(id="ORD-1", total_price=10.0, user_id="user-1", delivery_address="Casa 12, Colonia Palmira (portón negro)", delivery_date=datetime(2026, 1, 2)),
+      Order(id="ORD-2", total_price=10.0, user_id="user-1", delivery_address="Casa 3, Lugar Desconocido", delivery_date=datetime(2025, 12, 2), created_at=datetime(2025, 12, 1)),
+      Order(id="ORD-3", total_price=10.0, user_id="user-2", delivery_address="", delivery_date=datetime(2026, 1, 2)),
+  ])
+  session.commit()
+
+  with engine.begin() as conn:
+      orders_updated, users_updated = backfill_locations(conn, chunk_size=2, coordinates=_gazetteer_coordinates())
+  assert (orders_updated, users_updated) == (3, 1)
+
+  session.expire_all()
+  palmira = session.get(Order, "ORD-1")
+  assert palmira.colonia == "Palmira"
+  assert palmira.delivery_zone == zone_for_point(palmira.delivery_lat, palmira.delivery_lon) is not None
+  unknown = session.get(Order, "ORD-2")
+  assert unknown.colonia == "Lugar Desconocido" and unknown.delivery_zone is None
+  assert session.get(User, "user-1").colonia == "Palmira"
+  assert session.get(User, "user-2").colonia is None
@@ -0,0 +1,32 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from modules.analytics import order_trends, summarize
+from modules.models import Order, OrderStatus
+
+START = datetime(2026, 2, 1)
+
+def test_trend_charts_read_rollups_not_orders(session, engine):
+  session.add_all([
+      Order(
+          id=f"ORD-{i:03d}", plan_name=None if i % 4 == 0 else "Semanal", total_price=5.0 * i,
+          status=OrderStatus.delivered if i % 2 else OrderStatus.pending,
+          delivery_address="Casa 1", delivery_date=START, created_at=START + timedelta(hours=9 * i),
+      )
+      for i in range(20)
+  ])
+  session.commit()
+
+  statements = []
+  event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+  trends = order_trends(session, date(2026, 2, 1), date(2026, 2, 3))
+  assert not any("FROM orders" in statement for statement in statements)
+
+  # Hours 0..63 fall on Feb 1-3: orders 0..7
+  in_range = range(8)
+  assert summarize(trends, "day", "revenue")["revenue"].sum() == sum(5.0 * i for i in in_range)
+  status = dict(summarize(trends, "status").itertuples(index=False))
+  assert status == {"Pending": 4, "Delivered": 4}
+  plans = dict(summarize(trends, "plan_name", drop_blank=True).itertuples(index=False))
+  assert plans == {"Semanal": 6}
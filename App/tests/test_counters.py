@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from modules.counters import counter_drift, counter_table, read_counters, reconcile_counters
+from modules.database import count_queries
+from modules.models import Order, Subscription, User, UserType
+
+NOW = datetime(2026, 1, 1)
+
+def _seed(session):
+  session.add(User(id="user-1", name="Ana", email="ana@example.com", type=UserType.customer))
+  session.add_all([
+      Order(id=f"ORD-{i}", user_id="user-1", total_price=10.0, delivery_address="Casa 1", delivery_date=NOW)
+      for i in range(5)
+  ])
+  session.add(Subscription(id=1, user_id="user-1", plan_name="Semanal", start_date=NOW, is_active=True))
+  session.commit()
+
+def test_reconcile_corrects_drifted_counters(session, engine):
+  _seed(session)
+  with engine.connect() as conn:
+      assert counter_drift(conn) == {}
+  with engine.begin() as conn:
+      conn.execute(update(counter_table).where(counter_table.c.name == "orders").values(value=2))
+
+  assert reconcile_counters(engine) == {"orders": (2, 5)}
+  assert read_counters(session)["orders"] == 5
+  assert reconcile_counters(engine) == {}
+
+def test_recount_and_stored_values_are_one_snapshot(session, engine):
+  _seed(session)
+  with engine.connect() as conn, count_queries(engine) as counter:
+      counter_drift(conn)
+  # A single statement: no write can land between the recount and the stored read
+  assert counter["count"] == 1
@@ -0,0 +1,20 @@
+import os
+from datetime import datetime
+
+from modules import exports
+from modules.exports import export_orders, take_export
+from modules.models import Order
+
+def test_export_downloads_once_and_removes_its_file(session, engine, tmp_path, monkeypatch):
+  monkeypatch.setattr(exports, "EXPORT_DIR", str(tmp_path))
+  session.add_all([
+      Order(id=f"ORD-{i}", total_price=10.0, delivery_address="Casa 1", delivery_date=datetime(2026, 1, 2))
+      for i in range(3)
+  ])
+  session.commit()
+
+  path, rows = export_orders(engine, "csv", chunk_size=2)
+  assert rows == 3
+  data = take_export(path)
+  assert data.decode("utf-8-sig").count("ORD-") == 3
+  assert not os.path.exists(path)
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from modules.jobs import Job, JobRunner
+
+def test_lease_is_renewed_while_a_job_outlives_it(engine):
+  started, release = threading.Event(), threading.Event()
+  runs = []
+
+  def slow(engine):
+      runs.append(time.perf_counter())
+      started.set()
+      release.wait(5)
+
+  job = Job("slow", slow, interval=0, lease=0.3)
+  first = JobRunner(engine, {"slow": job}, owner="first")
+  second = JobRunner(engine, {"slow": job}, owner="second")
+  worker = threading.Thread(target=first.run_job, args=(job,))
+  worker.start()
+  started.wait(5)
+  try:
+      # Several lease lengths later the first runner still holds it
+      for _ in range(5):
+          time.sleep(0.2)
+          assert not second.run_job(job)
+  finally:
+      release.set()
+      worker.join()
+  assert len(runs) == 1
+  assert second.run_job(job)
@@ -0,0 +1,29 @@
+import os
+
+import folium
+import pytest
+
+from modules import map_cache
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+  monkeypatch.setattr(map_cache, "CACHE_DIR", str(tmp_path))
+  monkeypatch.setattr(map_cache, "_entries", type(map_cache._entries)())
+  return tmp_path
+
+def _key(payload):
+  return map_cache.content_hash({"payload": payload, "vendored": map_cache.vendored_assets()})
+
+def test_truncated_disk_entry_is_rendered_again(cache_dir):
+  payload = {"center": [14.07, -87.19]}
+  # What a reader sees while an in-place write is still under way
+  (cache_dir / f"{_key(payload)}.html").write_text("")
+
+  html, _, cached = map_cache.render_map_html(payload, lambda: folium.Map(location=payload["center"]))
+  assert not cached and "leaflet" in html.lower()
+  assert (cache_dir / f"{_key(payload)}.html").read_text(encoding="utf-8") == html
+  assert [name for name in os.listdir(cache_dir) if not name.endswith(".html")] == []
+
+  map_cache._entries.clear()
+  reread, _, cached = map_cache.render_map_html(payload, lambda: pytest.fail("re-rendered"))
+  assert cached and reread == html
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from modules import pickers
+from modules.models import Subscription, User, UserType
+from modules.pickers import entity_picker, picker_matches
+
+class FakeStreamlit:
+  """The widget behaviour entity_picker relies on, across reruns."""
+
+  def __init__(self, term):
+      self.session_state = {}
+      self.term = term
+      self.choose = None
+
+  def text_input(self, label, key):
+      return self.term
+
+  def selectbox(self, label, options, format_func, key, label_visibility):
+      for option in options:
+          format_func(option)
+      # Streamlit keeps a widget's value only while it is still an option
+      if self.choose is not None:
+          self.session_state[key], self.choose = self.choose(options), None
+      elif self.session_state.get(key) not in options:
+          self.session_state[key] = options[0]
+      return self.session_state[key]
+
+  def caption(self, text):
+      pass
+
+def _user(i, email):
+  return User(id=f"user-{i}", name=f"Cliente {i}", email=email, type=UserType.customer)
+
+def test_subscriptions_tied_on_email_come_back_in_key_order(session):
+  session.add(_user(1, "ana@example.com"))
+  session.add_all([Subscription(id=i, user_id="user-1", plan_name="Semanal", start_date=datetime(2026, 1, 1))
+                   for i in (7, 3, 9, 1)])
+  session.commit()
+  assert [sub.id for sub in picker_matches(session, Subscription, "ana")] == [1, 3, 7, 9]
+
+def test_picker_returns_the_chosen_row_after_other_rows_match_ahead_of_it(session, monkeypatch):
+  session.add_all([_user(i, f"ana{i:02d}@example.com") for i in range(10, 20)])
+  session.commit()
+  fake = FakeStreamlit("ana")
+  monkeypatch.setattr(pickers, "st", fake)
+
+  fake.choose = lambda options: options[-1]
+  chosen = entity_picker(session, User, "Buscar", "edit_user")
+  assert chosen.id == "user-19"
+
+  # Rows inserted between reruns push the choice out of the first matches
+  session.add_all([_user(i, f"ana{i:02d}@example.com") for i in range(10)])
+  session.commit()
+  assert entity_picker(session, User, "Buscar", "edit_user").id == "user-19"
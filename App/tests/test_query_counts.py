@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from modules.database import count_queries
+from modules.models import Order, Product, User, UserType
+from modules.queries import order_query
+
+USERS = 5
+PRODUCTS = 3
+ORDERS = 60
+
+@pytest.fixture
+def seeded(session):
+  now = datetime(2026, 1, 1)
+  session.add_all([
+      User(id=f"user-{i}", name=f"Cliente {i}", email=f"cliente{i}@example.com", type=UserType.customer)
+      for i in range(USERS)
+  ])
+  session.add_all([Product(id=i + 1, name=f"Producto {i}", price=10.0) for i in range(PRODUCTS)])
+  session.add_all([
+      Order(
+          id=f"ORD-{i:05d}", user_id=f"user-{i % USERS}", product_id=i % PRODUCTS + 1,
+          total_price=10.0, delivery_address="Casa 1", delivery_date=now, created_at=now - timedelta(minutes=i),
+      )
+      for i in range(ORDERS)
+  ])
+  session.commit()
+  # Start from an empty identity map, as a fresh page render does
+  session.expunge_all()
+  return session
+
+def test_admin_order_listing_is_one_query(seeded, engine):
+  with count_queries(engine) as counter:
+      orders = order_query(seeded, "admin_orders").order_by(Order.created_at.desc()).limit(50).all()
+      rows = [(order.id, order.user.name, order.user.email) for order in orders]
+  assert len(rows) == 50
+  assert counter["count"] == 1
+
+def test_customer_orders_load_products_in_one_query(seeded, engine):
+  with count_queries(engine) as counter:
+      orders = order_query(seeded, "customer_orders").filter(Order.user_id == "user-0").order_by(Order.created_at.desc()).all()
+      rows = [(order.id, order.product.name) for order in orders]
+  assert len(rows) == ORDERS // USERS
+  # Orders, then every product in a single selectin query
+  assert counter["count"] == 2
+
+def test_route_planner_loads_customers_with_the_stops(seeded, engine):
+  from modules.routes import plan_routes
+  for i, order in enumerate(seeded.query(Order)):
+      order.delivery_lat, order.delivery_lon = 14.07 + i * 0.001, -87.2 + i * 0.001
+  seeded.commit()
+  seeded.expunge_all()
+  with count_queries(engine) as counter:
+      routes = plan_routes(seeded, datetime(2026, 1, 1).date(), time_limit=0.1)
+      names = [stop.user.name for route in routes.values() for stop in route["stops"]]
+  assert len(names) == ORDERS
+  assert counter["count"] == 1
+
+def test_route_planner_reads_orders_through_the_delivery_date_index(seeded, engine):
+  from modules.routes import plan_routes
+  statements = []
+  event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters)))
+  plan_routes(seeded, datetime(2026, 1, 1).date(), time_limit=0.1)
+  statement, parameters = statements[0]
+  with engine.connect() as conn:
+      plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+  assert "ix_orders_delivery_date" in plan
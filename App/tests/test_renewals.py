@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from modules.models import Order, Product, Subscription, User, UserType
+from modules.renewals import renew_subscriptions
+
+NOW = datetime(2026, 3, 2, 9, 0)
+
+def _cycles(session, sub_id):
+  return sorted(session.execute(select(Order.cycle).where(Order.subscription_id == sub_id)).scalars())
+
+def test_backfill_fills_cycles_missed_behind_the_latest(session, engine):
+  session.add(User(id="user-1", name="Cliente", email="cliente@example.com", type=UserType.customer))
+  session.add(Product(id=1, name="Pasto", price=10.0))
+  start = NOW - timedelta(days=54)
+  sub = Subscription(user_id="user-1", plan_name="Suscripción Anual", start_date=start, is_active=True)
+  session.add(sub)
+  session.flush()
+  session.add(Order(
+      id="ORD-CHECKOUT", user_id="user-1", product_id=1, total_price=10.0, delivery_address="Casa 1",
+      delivery_date=start, delivery_time="AM (7am - 12pm)", plan_name="Suscripción Anual",
+      subscription_id=sub.id, cycle=0,
+  ))
+  session.commit()
+
+  # Without backfill only the cycle that is still ahead is generated
+  assert renew_subscriptions(engine, now=NOW)["created"] == 1
+  assert _cycles(session, sub.id) == [0, 4]
+
+  stats = renew_subscriptions(engine, now=NOW, backfill=True)
+  assert stats["created"] == 3
+  assert _cycles(session, sub.id) == [0, 1, 2, 3, 4]
+  # Re-running is a no-op
+  assert renew_subscriptions(engine, now=NOW, backfill=True)["created"] == 0
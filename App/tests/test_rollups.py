@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+
+from modules.models import Order, OrderDailyRollup, OrderStatus, Product
+from modules.network import _load_seed
+from modules.rollups import rebuild_rollups
+
+NOW = datetime(2026, 1, 1)
+
+def _rollup_rows(session):
+  return sorted(session.execute(select(OrderDailyRollup.__table__)).all(), key=repr)
+
+def test_listener_keeps_plan_product_rollups_and_seed_reads_them(session, engine):
+  session.add_all([Product(id=i, name=f"Producto {i}", price=10.0) for i in (1, 2)])
+  session.add_all([
+      Order(
+          id=f"ORD-{i:03d}", product_id=i % 2 + 1, plan_name="Semanal" if i % 3 else "Mensual",
+          delivery_zone="Norte", total_price=10.0, delivery_address="Casa 1",
+          delivery_date=NOW, created_at=NOW - timedelta(hours=i),
+      )
+      for i in range(12)
+  ])
+  session.commit()
+  order = session.get(Order, "ORD-001")
+  order.product_id, order.status = 1, OrderStatus.delivered
+  session.commit()
+
+  written = _rollup_rows(session)
+  with engine.begin() as conn:
+      rebuild_rollups(conn)
+  assert _rollup_rows(session) == written
+
+  statements = []
+  event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+  _, edges = _load_seed(session)
+  contains = {(edge["data"]["source"], edge["data"]["target"]): edge["data"]["count"]
+              for edge in edges if edge["data"]["label"] == "CONTAINS"}
+  assert contains == {
+      ("plan:Mensual", "product:1"): 2, ("plan:Mensual", "product:2"): 2,
+      ("plan:Semanal", "product:1"): 5, ("plan:Semanal", "product:2"): 3,
+  }
+  assert not any("FROM orders" in statement for statement in statements)
+
+def test_importing_models_registers_the_session_listeners():
+  # A fresh interpreter, as on the login path that only touches models
+  check = (
+      "import sys, modules.models; from sqlalchemy import event; from sqlalchemy.orm import Session; "
+      "listeners = [getattr(sys.modules[name], listener, None) for name, listener in ("
+      "('modules.rollups', '_maintain_rollups'), ('modules.slots', '_maintain_slots'), "
+      "('modules.counters', '_maintain_counters'))]; "
+      "sys.exit(not all(event.contains(Session, 'after_flush', listener) for listener in listeners))"
+  )
+  app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  assert subprocess.run([sys.executable, "-c", check], cwd=app_dir).returncode == 0
@@ -0,0 +1,50 @@
+from sqlalchemy import text
+
+from modules.models import User, UserType
+from modules import search as search_module
+from modules.search import create_search_indexes, search
+
+def _user(i, name, is_active):
+  return User(id=f"user-{i}", name=name, email=f"cliente{i}@example.com", type=UserType.customer, is_active=is_active)
+
+def test_filters_apply_before_ranking_a_common_term(session, engine):
+  with engine.begin() as conn:
+      create_search_indexes(conn)
+  # Far more inactive matches than any candidate cut-off, inserted first
+  session.add_all([_user(i, f"Ana López {i}", False) for i in range(800)])
+  session.add_all([_user(800, "Jorge López", True), _user(801, "Luis Lopez", True), _user(802, "María Cruz", True)])
+  session.commit()
+
+  active = session.query(User).filter(User.is_active.is_(True))
+  assert {user.id for user in search(session, User, "lópez", query=active)} == {"user-800"}
+  assert {user.id for user in search(session, User, "lopez", query=active)} == {"user-801"}
+
+def test_search_tables_follow_writes_and_vacuum(session, engine):
+  with engine.begin() as conn:
+      create_search_indexes(conn)
+  session.add_all([_user(i, f"Cliente {i}", True) for i in range(30)])
+  session.commit()
+  session.delete(session.get(User, "user-3"))
+  session.get(User, "user-4").name = "Sofía Zelaya"
+  session.commit()
+  # FTS rows are keyed through an INTEGER PRIMARY KEY map, so VACUUM cannot move them
+  with engine.connect() as conn:
+      conn.execute(text("VACUUM"))
+
+  assert [user.id for user in search(session, User, "zelaya")] == ["user-4"]
+  assert "user-3" not in {user.id for user in search(session, User, "cliente", limit=50)}
+  # user-4 still matches "cliente" by email
+  assert len(search(session, User, "cliente", limit=50)) == 29
+  with engine.connect() as conn:
+      # One key-map and one FTS row per user, after the delete and the edit
+      assert conn.execute(text("SELECT count(*) FROM users_search_keys")).scalar() == 29
+      assert conn.execute(text("SELECT count(*) FROM users_search")).scalar() == 29
+
+def test_sqlite_without_trigram_tokenizer_falls_back_to_like(session, engine, monkeypatch):
+  monkeypatch.setattr(search_module, "TRIGRAM_SQLITE_VERSION", (99, 0, 0))
+  with engine.begin() as conn:
+      create_search_indexes(conn)
+      assert conn.execute(text("SELECT count(*) FROM sqlite_master WHERE name LIKE 'users_search%'")).scalar() == 0
+  session.add_all([_user(1, "Jorge Zelaya", True), _user(2, "Ana Cruz", True)])
+  session.commit()
+  assert [user.id for user in search(session, User, "zelaya")] == ["user-1"]
@@ -0,0 +1,43 @@
+"""Background job runner for ©Pasto Verde, run next to the Streamlit app.
+
+    python worker.py           # poll and run due jobs until SIGTERM
+    python worker.py --once    # run whatever is due now and exit
+
+Every replica may run a worker; a lease in the job_leases table makes sure
+each job runs on one of them at a time.
+"""
+import argparse
+import logging
+
+from modules.database import get_engine
+from modules.ids import get_id_generator
+from modules.jobs import JOBS, JobRunner
+from modules.schema import SCHEMA_VERSION, current_version
+
+logging.basicConfig(
+  level=logging.INFO,
+  format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+def main():
+  parser = argparse.ArgumentParser(description="©Pasto Verde background jobs")
+  parser.add_argument("--database-url", default=None, help="Defaults to secrets/DATABASE_URL")
+  parser.add_argument("--once", action="store_true", help="Run due jobs once and exit")
+  parser.add_argument("--poll-interval", type=float, default=None, help="Seconds between schedule checks")
+  args = parser.parse_args()
+
+  engine = get_engine(args.database_url)
+  with engine.connect() as conn:
+      if current_version(conn) < SCHEMA_VERSION:
+          parser.exit(1, "Database schema is outdated; run `python manage.py bootstrap-schema` first.\n")
+  # Renewals create orders: check the order ID node id before the first job
+  get_id_generator()
+  runner = JobRunner(engine, JOBS, poll_interval=args.poll_interval)
+  if args.once:
+      ran = runner.run_pending()
+      print(f"Ran: {', '.join(ran) or 'nothing due'}")
+  else:
+      runner.run_forever()
+
+if __name__ == "__main__":
+  main()